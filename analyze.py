@@ -0,0 +1,229 @@
+"""
+Audit recorded games against perfect play.
+
+Streams every game out of one or more engine.records files and marks each
+move of the 3x3 games as best, inaccuracy or blunder by comparing it with
+the exact values MinimaxBot.rank_moves gives every legal move:
+
+    best        the move keeps the best value available
+    inaccuracy  same result with perfect play, but slower (a longer win or
+                a quicker loss)
+    blunder     the move throws away a win or a draw
+
+Results are aggregated per player and difficulty. Games are analyzed in
+batches across worker processes; each worker caches the ranking of every
+position it has seen, and the perfect-play table behind the rankings is
+one memory-mapped file shared by all of them, so repeated positions across
+millions of games cost a dictionary lookup. Games on larger boards have no
+perfect-play values and are counted as skipped.
+
+    python analyze.py games.ttg --workers 4 --json report.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bots.minimax_bot import MinimaxBot
+from engine.bitboard import Bitboard
+from engine.records import read_games
+
+BEST, INACCURACY, BLUNDER = 'best', 'inaccuracy', 'blunder'
+
+COUNTERS = ('games', 'wins', 'draws', 'losses', 'moves', BEST, INACCURACY, BLUNDER, 'value_lost')
+
+
+def _outcome(value):
+    return (value > 0) - (value < 0)
+
+
+def classify(best_value, value):
+    """Mark a move worth ``value`` where ``best_value`` was available"""
+    if value == best_value:
+        return BEST
+    if _outcome(value) != _outcome(best_value):
+        return BLUNDER
+    return INACCURACY
+
+
+class MoveJudge:
+    """Ranks positions with MinimaxBot and remembers every ranking it made"""
+
+    def __init__(self):
+        self.bot = MinimaxBot('hard')
+        self.cache = {}  # packed x << 9 | o -> (best value, {square: value})
+        self.hits = 0
+        self.misses = 0
+
+    def values(self, state):
+        key = state.x << 9 | state.o
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        ranked = self.bot.rank_moves(state.to_matrix())
+        values = {row * 3 + col: value for value, (row, col) in ranked}
+        entry = self.cache[key] = (ranked[0][0] if ranked else 0, values)
+        return entry
+
+    def judge(self, moves):
+        """(letter, square, best value, value, classification) for each move of a game"""
+        state = Bitboard()
+        result = []
+        for ply, square in enumerate(moves):
+            best, values = self.values(state)
+            value = values.get(square)
+            if value is None:
+                break  # illegal or played after the game was over
+            letter = 'X' if ply % 2 == 0 else 'O'
+            result.append((letter, square, best, value, classify(best, value)))
+            state.place(square, letter == 'X')
+        return result
+
+
+_judge = None
+
+
+def _player_key(player):
+    name, difficulty = player
+    return f"{name}:{difficulty}" if difficulty else name
+
+
+def _new_stats():
+    return dict.fromkeys(COUNTERS, 0)
+
+
+def _analyze_batch(games):
+    """Worker: judge a batch of (players, moves, winner) and return the tallies"""
+    global _judge
+    if _judge is None:
+        _judge = MoveJudge()
+    hits, misses = _judge.hits, _judge.misses
+    stats = {}
+    for players, moves, winner in games:
+        keys = [_player_key(player) for player in players]
+        for letter, key in zip('XO', keys):
+            player_stats = stats.setdefault(key, _new_stats())
+            player_stats['games'] += 1
+            if winner is None:
+                player_stats['draws'] += 1
+            elif winner == letter:
+                player_stats['wins'] += 1
+            else:
+                player_stats['losses'] += 1
+        for letter, _, best, value, mark in _judge.judge(moves):
+            player_stats = stats[keys[0] if letter == 'X' else keys[1]]
+            player_stats['moves'] += 1
+            player_stats[mark] += 1
+            player_stats['value_lost'] += best - value
+    return stats, _judge.hits - hits, _judge.misses - misses
+
+
+def _merge(totals, stats):
+    for key, counters in stats.items():
+        into = totals.setdefault(key, _new_stats())
+        for name, count in counters.items():
+            into[name] += count
+
+
+def _batches(paths, batch_size, skipped):
+    """Group the analyzable games of every file into lists of (players, moves, winner)"""
+    batch = []
+    for path in paths:
+        for record in read_games(path):
+            if record.size != 3 or record.win_length != 3 or not record.finished:
+                skipped[0] += 1
+                continue
+            batch.append((record.players, record.moves, record.winner))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def analyze(paths, workers=None, batch_size=5000, on_progress=None):
+    """
+    Analyze every game in ``paths`` and return the report. Only a few
+    batches per worker are in flight at a time, so memory stays flat
+    however large the archives are.
+    """
+    totals = {}
+    skipped = [0]
+    hits = misses = analyzed = 0
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        limit = 2 * workers
+        pending = {}
+        for batch in _batches(paths, batch_size, skipped):
+            if len(pending) >= limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    analyzed += pending.pop(future)
+                    stats, batch_hits, batch_misses = future.result()
+                    _merge(totals, stats)
+                    hits += batch_hits
+                    misses += batch_misses
+                    if on_progress:
+                        on_progress(analyzed, time.perf_counter() - start)
+            pending[pool.submit(_analyze_batch, batch)] = len(batch)
+        for future, count in pending.items():
+            stats, batch_hits, batch_misses = future.result()
+            _merge(totals, stats)
+            hits += batch_hits
+            misses += batch_misses
+            analyzed += count
+
+    for counters in totals.values():
+        moves = counters['moves'] or 1
+        for mark in (BEST, INACCURACY, BLUNDER):
+            counters[f'{mark}_rate'] = counters[mark] / moves
+        counters['mean_value_lost'] = counters['value_lost'] / moves
+    return {
+        'files': list(paths),
+        'games': analyzed,
+        'skipped': skipped[0],
+        'cache_hits': hits,
+        'cache_misses': misses,
+        'seconds': time.perf_counter() - start,
+        'players': totals,
+    }
+
+
+def _print_progress(games, seconds):
+    print(f"{games} games, {games / seconds:.0f} games/s", flush=True)
+
+
+def _print_report(report):
+    print("\nplayer                  games     W/D/L              moves    best   inacc  blunder")
+    for key, s in sorted(report['players'].items()):
+        wdl = f"{s['wins']}/{s['draws']}/{s['losses']}"
+        print(f"{key:<20}{s['games']:>9}  {wdl:<17}{s['moves']:>9}{s['best_rate']:>8.1%}"
+              f"{s['inaccuracy_rate']:>8.1%}{s['blunder_rate']:>9.1%}")
+    lookups = report['cache_hits'] + report['cache_misses']
+    print(f"\n{report['games']} games in {report['seconds']:.1f}s, {report['skipped']} skipped, "
+          f"{report['cache_hits'] / (lookups or 1):.1%} of positions from cache")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mark recorded moves as best, inaccuracy or blunder")
+    parser.add_argument('files', nargs='+', help="game record files")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="games per worker task")
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--quiet', action='store_true', help="do not print progress")
+    args = parser.parse_args(argv)
+
+    report = analyze(args.files, args.workers, args.batch_size, None if args.quiet else _print_progress)
+    _print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""
+Benchmarks for bot search, move generation and win detection.
+
+    python bench.py --out results.json
+    python bench.py --compare baseline.json results.json --threshold 0.1
+
+The first form runs every benchmark and writes the metrics as JSON. The
+second compares two result files and exits with status 1 when a metric got
+worse by more than the threshold (a fraction, 0.1 = 10%).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from bots.minimax_bot import MinimaxBot
+from engine.bitboard import Bitboard
+from engine.nboard import Board
+from engine.search import IterativeDeepeningSearch, ParallelSearch
+from engine.transposition import TranspositionTable
+from engine.ultimate import UltimateBoard
+from game import TicTacToe
+
+# Standard positions, row-major, '.' for empty
+POSITIONS = {
+    'empty': '.........',
+    'opening': '....X....',
+    'midgame': 'X.O.X...O',   # X to move after O blocked the diagonal
+    'forced_win': 'XO..X...O',  # X to move forks and wins
+}
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def parse_position(text, size=3):
+    """'X.O......' -> 2D board in the GUI's None/1/0 layout"""
+    values = {'X': 1, 'O': 0, '.': None}
+    return [[values[text[r * size + c]] for c in range(size)] for r in range(size)]
+
+
+def _timed(fn, repeat):
+    """Run fn ``repeat`` times and return the per-call times in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _latency_metrics(name, times):
+    times_ms = sorted(t * 1000 for t in times)
+    p95 = times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))]
+    return {
+        f'{name}.mean_ms': (statistics.fmean(times_ms), 'ms', 'lower'),
+        f'{name}.p95_ms': (p95, 'ms', 'lower'),
+    }
+
+
+def bench_get_move(repeat):
+    """Warm get_move latency at each difficulty, plus a cold search with empty caches"""
+    metrics = {}
+    random.seed(0)
+    for difficulty in DIFFICULTIES:
+        bot = MinimaxBot(difficulty)
+        for name, text in POSITIONS.items():
+            board = parse_position(text)
+            bot.get_move(board)  # warm the caches
+            times = _timed(lambda: bot.get_move(board), repeat)
+            metrics.update(_latency_metrics(f'get_move.{difficulty}.{name}', times))
+
+    for name, text in POSITIONS.items():
+        board = parse_position(text)
+
+        def cold():
+            MinimaxBot('hard', table=TranspositionTable(), use_lookup=False).get_move(board)
+
+        times = _timed(cold, max(1, repeat // 10))
+        metrics.update(_latency_metrics(f'get_move.cold_search.{name}', times))
+    return metrics
+
+
+def bench_nodes_per_second():
+    """Raw search speed of each search mode with caching turned off"""
+    metrics = {}
+    board = parse_position(POSITIONS['opening'])
+    for search in ('minimax', 'alphabeta'):
+        bot = MinimaxBot('hard', table=TranspositionTable(0), search=search, use_lookup=False)
+        start = time.perf_counter()
+        bot.get_move(board)
+        elapsed = time.perf_counter() - start
+        metrics[f'search.{search}.nodes'] = (bot.nodes, 'nodes', 'lower')
+        metrics[f'search.{search}.nps'] = (bot.nodes / elapsed, 'nodes/s', 'higher')
+
+    searcher = IterativeDeepeningSearch(time_budget=0.5)
+    start = time.perf_counter()
+    searcher.search(Board(4, 4))
+    elapsed = time.perf_counter() - start
+    metrics['search.nboard_4x4.nps'] = (searcher.nodes / elapsed, 'nodes/s', 'higher')
+    metrics['search.nboard_4x4.depth'] = (searcher.depth_reached, 'plies', 'higher')
+    return metrics
+
+
+def bench_ultimate(playouts=200):
+    """Legal-move generation over random ultimate games, and search speed from the opening"""
+    rng = random.Random(0)
+    generated = 0
+    start = time.perf_counter()
+    for _ in range(playouts):
+        board = UltimateBoard()
+        while True:
+            moves = board.legal_moves()
+            generated += 1
+            if not moves:
+                break
+            board.play(rng.choice(moves))
+    elapsed = time.perf_counter() - start
+
+    searcher = IterativeDeepeningSearch(time_budget=0.5)
+    search_start = time.perf_counter()
+    searcher.search(UltimateBoard())
+    search_elapsed = time.perf_counter() - search_start
+    return {
+        'ultimate.playout.moves_per_s': (generated / elapsed, 'moves/s', 'higher'),
+        'ultimate.search.nps': (searcher.nodes / search_elapsed, 'nodes/s', 'higher'),
+        'ultimate.search.depth': (searcher.depth_reached, 'plies', 'higher'),
+    }
+
+
+def bench_parallel_search(workers):
+    """Fixed-depth 5x5 search in one process and spread over ``workers`` processes"""
+    board = Board(5, 4)
+    board.play(12)
+    serial = IterativeDeepeningSearch(time_budget=None, max_depth=8)
+    start = time.perf_counter()
+    serial.search(board)
+    serial_time = time.perf_counter() - start
+
+    parallel = ParallelSearch(time_budget=None, max_depth=8, workers=workers)
+    try:
+        parallel.search(Board(3, 3))  # start the worker processes outside the timing
+        parallel.table.clear()
+        start = time.perf_counter()
+        parallel.search(board)
+        parallel_time = time.perf_counter() - start
+    finally:
+        parallel.close()
+    return {
+        'search.parallel_5x5.serial_s': (serial_time, 's', 'lower'),
+        f'search.parallel_5x5.workers_{workers}_s': (parallel_time, 's', 'lower'),
+        f'search.parallel_5x5.workers_{workers}_speedup': (serial_time / parallel_time, 'x', 'higher'),
+        # Extra nodes searched because workers start without each other's bounds
+        f'search.parallel_5x5.workers_{workers}_node_ratio': (parallel.nodes / serial.nodes, 'x', 'lower'),
+    }
+
+
+def bench_win_detection(repeat):
+    """Calls per second of the three win checks on the same position"""
+    from gui import matrix  # imports tkinter, so only when this benchmark runs
+
+    metrics = {}
+    cells = 'XO.XX.O.O'
+
+    game = TicTacToe()
+    for square, cell in enumerate(cells):
+        if cell != '.':
+            game.make_move(square, cell)
+    mat = matrix()
+    for square, cell in enumerate(cells):
+        if cell != '.':
+            mat.place(square // 3, square % 3, 1 if cell == 'X' else 0)
+    bot = MinimaxBot('hard')
+    state = Bitboard.from_list([' ' if c == '.' else c for c in cells])
+
+    checks = {
+        'TicTacToe.winner': lambda: game.winner(3, 'X'),
+        'matrix.check_win': mat.check_win,
+        'MinimaxBot._evaluate': lambda: bot._evaluate(state.x, state.o),
+    }
+    calls = repeat * 1000
+    for name, fn in checks.items():
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        metrics[f'win_check.{name}.calls_per_s'] = (calls / elapsed, 'calls/s', 'higher')
+
+    try:
+        import numpy as np
+        from engine import batch
+    except ImportError:
+        return metrics
+    boards = np.random.default_rng(0).integers(0, 3, size=(100000, 9), dtype=np.int8)
+    start = time.perf_counter()
+    batch.classify(boards)
+    elapsed = time.perf_counter() - start
+    metrics['win_check.batch.classify.boards_per_s'] = (len(boards) / elapsed, 'boards/s', 'higher')
+    return metrics
+
+
+def bench_memory():
+    """Peak traced memory of a cold search and of a short self-play run"""
+    metrics = {}
+    tracemalloc.start()
+    MinimaxBot('hard', table=TranspositionTable(), use_lookup=False).get_move(
+        parse_position(POSITIONS['empty']))
+    metrics['memory.cold_search.peak_kb'] = (tracemalloc.get_traced_memory()[1] / 1024, 'KiB', 'lower')
+    tracemalloc.stop()
+
+    from tournament import play_headless
+    tracemalloc.start()
+    random.seed(0)
+    for _ in range(50):
+        play_headless(TicTacToe(), MinimaxBot('medium'), MinimaxBot('hard'))
+    metrics['memory.self_play.peak_kb'] = (tracemalloc.get_traced_memory()[1] / 1024, 'KiB', 'lower')
+    tracemalloc.stop()
+    return metrics
+
+
+def run(repeat=200, workers=None):
+    metrics = {}
+    metrics.update(bench_get_move(repeat))
+    metrics.update(bench_nodes_per_second())
+    metrics.update(bench_ultimate())
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        metrics.update(bench_parallel_search(workers))
+    metrics.update(bench_win_detection(repeat))
+    metrics.update(bench_memory())
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'workers': workers,
+        },
+        'metrics': {name: {'value': value, 'unit': unit, 'better': better}
+                    for name, (value, unit, better) in sorted(metrics.items())},
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Return (name, old, new, relative change, regressed) for every shared metric"""
+    rows = []
+    for name, new in current['metrics'].items():
+        old = baseline['metrics'].get(name)
+        if old is None or old['value'] == 0:
+            continue
+        change = (new['value'] - old['value']) / old['value']
+        worse = change if new['better'] == 'lower' else -change
+        rows.append((name, old['value'], new['value'], change, worse > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tic Tac Toe engine benchmarks")
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--repeat', type=int, default=200, help="timed calls per latency benchmark")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="compare two result files instead of running")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative change that counts as a regression")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes for the parallel search benchmark (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.threshold)
+        for name, old, new, change, regressed in rows:
+            flag = 'REGRESSION' if regressed else ''
+            print(f"{name:<50}{old:>14.4g}{new:>14.4g}{change:>+9.1%}  {flag}")
+        regressions = sum(1 for row in rows if row[4])
+        print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    results = run(args.repeat, args.workers)
+    for name, metric in results['metrics'].items():
+        print(f"{name:<50}{metric['value']:>14.4g} {metric['unit']}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import json
+import time
+
+
+class SearchStats:
+    """What a bot did to choose one move, passed to observers after get_move"""
+    __slots__ = ('move', 'source', 'nodes', 'cache_hits', 'cache_misses', 'cutoffs',
+                 'max_depth', 'wall_time', 'principal_variation')
+
+    def __init__(self):
+        self.move = None
+        self.source = None  # e.g. 'search', 'lookup', 'ponder' or 'heuristic'
+        self.nodes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cutoffs = 0
+        self.max_depth = 0
+        self.wall_time = 0.0
+        self.principal_variation = []
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"SearchStats({self.as_dict()})"
+
+
+class StatsLogger:
+    """Observer that appends each move's stats to a file as one JSON line"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __call__(self, stats):
+        self.stream.write(json.dumps(stats.as_dict()) + '\n')
+
+
+class BotInterface:
+    def __init__(self, difficulty='medium'):
+        self.difficulty = difficulty.lower()
+        # Callables receiving a SearchStats after every move, none by default
+        self.observers = []
+        # threading.Event of the move being searched, bots that search check it to stop early
+        self.stop_event = None
+
+    def get_move(self, board, stop_event=None):
+        """
+        Return the (row, col) the bot wants to play on the given 2D board.
+        Setting ``stop_event`` cuts a long search short with the best move
+        found so far.
+        """
+        self.stop_event = stop_event
+        try:
+            if not self.observers:
+                return self.choose_move(board)
+            return self._observed_move(board)
+        finally:
+            self.stop_event = None
+
+    def stopped(self):
+        """True once the stop_event of the move being searched is set"""
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def choose_move(self, board):
+        """Pick the move, implemented by each bot"""
+        raise NotImplementedError
+
+    def get_moves(self, boards):
+        """Moves for many boards at once, in order; bots that can share work between boards override this"""
+        return [self.get_move(board) for board in boards]
+
+    def ponder(self, board, stop_event=None):
+        """Use the opponent's thinking time on ``board``, bots that can search ahead override this"""
+
+    def has_pondered(self, board):
+        """True when get_move can answer ``board`` without searching"""
+        return False
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def begin_stats(self, stats):
+        """Called before an observed move, bots record their starting counters here"""
+
+    def end_stats(self, stats, board):
+        """Called after an observed move, bots fill in their search counters here"""
+
+    def _observed_move(self, board):
+        stats = SearchStats()
+        self.begin_stats(stats)
+        start = time.perf_counter()
+        move = self.choose_move(board)
+        stats.wall_time = time.perf_counter() - start
+        stats.move = move
+        self.end_stats(stats, board)
+        for observer in self.observers:
+            observer(stats)
+        return move
+
+    def profile_move(self, board, sort='cumulative', limit=25):
+        """Run a single get_move under cProfile and return (move, report text)"""
+        import cProfile  # profiling tools are only loaded when asked for
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        move = profiler.runcall(self.get_move, board)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return move, out.getvalue()
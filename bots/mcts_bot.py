@@ -0,0 +1,215 @@
+import math
+import random
+import time
+from .bot_interface import BotInterface
+from engine.nboard import Board, EMPTY, X, O
+
+# Default thinking time per difficulty on the 3x3 board, in milliseconds.
+# Bigger boards get this times sqrt(squares / 9), e.g. 5x on 15x15.
+TIME_MS = {
+    'easy': 10,
+    'medium': 80,
+    'hard': 300,
+}
+
+
+class _Node:
+    """One position in the search tree, reached by ``player`` playing ``square``"""
+    __slots__ = ('square', 'player', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, square, player, parent, untried):
+        self.square = square
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0  # from the point of view of ``player``
+
+
+class MCTSBot(BotInterface):
+    """
+    Monte Carlo Tree Search with UCT selection and random playouts.
+
+    The budget is ``iterations`` per move, ``time_ms`` per move, or both
+    (whichever runs out first). Without either the difficulty picks a time
+    budget that grows with the board, so a move takes a predictable time.
+    Each expanded leaf is scored with a batch of ``rollouts`` playouts, and
+    the subtree under the move actually played is kept for the next move.
+    """
+    bot_type = 'mcts'  # name create_bot knows this bot by
+
+    def __init__(self, difficulty='medium', iterations=None, time_ms=None, rollouts=4,
+                 exploration=1.4, win_length=None):
+        super().__init__(difficulty)
+        self.iterations = iterations
+        self.time_ms = time_ms
+        self.rollouts = rollouts
+        self.exploration = exploration
+        self.win_length = win_length
+
+        self.root = None
+        self.root_cells = None
+
+        # Counters of the last move, reported to observers
+        self.nodes = 0
+        self.reused = False
+
+    def choose_move(self, board):
+        """Run MCTS within the budget and play the most visited move"""
+        state = Board.from_matrix(board, self.win_length)
+        if state.is_over():
+            return None
+        moves = state.candidate_moves()
+        side = state.to_move()
+
+        # Take a win on the spot or block the opponent's, searching cannot do better
+        forced = self._forced_move(state, moves, side)
+        if forced is not None:
+            self.root = None
+            self.nodes = 0
+            self.reused = False
+            return divmod(forced, state.size)
+
+        root = self._reuse_root(state)
+        self.reused = root is not None
+        if root is None:
+            root = _Node(None, O if side == X else X, None, moves)
+
+        self.nodes = 0
+        time_ms = self.time_ms
+        if time_ms is None and self.iterations is None:
+            time_ms = TIME_MS.get(self.difficulty, TIME_MS['hard']) * math.sqrt(len(state.cells) / 9)
+        if time_ms is not None:
+            deadline = time.perf_counter() + time_ms / 1000
+            while True:
+                self._iterate(root, state)
+                if self.iterations is not None and self.nodes >= self.iterations:
+                    break
+                if time.perf_counter() >= deadline or self.stopped():
+                    break
+        else:
+            for _ in range(self.iterations):
+                self._iterate(root, state)
+                if self.stopped():
+                    break
+
+        if not root.children:
+            # The budget ran out before a single playout
+            self.root = None
+            return divmod(random.choice(moves), state.size)
+        best = max(root.children.values(), key=lambda child: child.visits)
+        # Keep the chosen subtree for the next move
+        self.root = best
+        best.parent = None
+        state.play(best.square)
+        self.root_cells = list(state.cells)
+        return divmod(best.square, state.size)
+
+    def _forced_move(self, state, moves, side):
+        opponent = O if side == X else X
+        for player in (side, opponent):
+            for square in moves:
+                state.place(square, player == X)
+                won = state.winner == player
+                state.undo()
+                if won:
+                    return square
+        return None
+
+    def _reuse_root(self, state):
+        """The kept subtree's child matching the opponent's reply, if there is one"""
+        if self.root is None or self.root_cells is None or len(self.root_cells) != len(state.cells):
+            return None
+        new = [square for square, (old, cell) in enumerate(zip(self.root_cells, state.cells))
+               if old != cell]
+        if len(new) != 1 or self.root_cells[new[0]] != EMPTY:
+            return None
+        child = self.root.children.get(new[0])
+        if child is None:
+            return None
+        child.parent = None
+        return child
+
+    def _iterate(self, root, state):
+        self.nodes += 1
+        node = root
+        played = 0
+
+        # Selection: follow UCT while every move of the node has been tried
+        while not node.untried and node.children and state.winner is None:
+            node = self._select(node)
+            state.play(node.square)
+            played += 1
+
+        # Expansion
+        if node.untried and state.winner is None:
+            square = node.untried.pop(random.randrange(len(node.untried)))
+            player = state.to_move()
+            state.play(square)
+            played += 1
+            child = _Node(square, player, node, [] if state.is_over() else state.candidate_moves())
+            node.children[square] = child
+            node = child
+
+        # Simulation: a batch of random playouts from the new leaf
+        x_points = self._rollout_batch(state)
+
+        # Backpropagation
+        count = self.rollouts
+        while node is not None:
+            node.visits += count
+            node.wins += x_points if node.player == X else count - x_points
+            node = node.parent
+
+        for _ in range(played):
+            state.undo()
+
+    def _select(self, node):
+        log_visits = math.log(node.visits)
+        c = self.exploration
+        best, best_value = None, -1.0
+        for child in node.children.values():
+            value = child.wins / child.visits + c * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def _rollout_batch(self, state):
+        """Play ``self.rollouts`` random games from ``state``, return X's points (draw = 0.5)"""
+        if state.winner is not None or state.is_full():
+            result = 1.0 if state.winner == X else 0.0 if state.winner == O else 0.5
+            return result * self.rollouts
+
+        empty = state.empty_squares()
+        points = 0.0
+        for _ in range(self.rollouts):
+            random.shuffle(empty)
+            played = 0
+            for square in empty:
+                state.play(square)
+                played += 1
+                if state.winner is not None:
+                    break
+            if state.winner == X:
+                points += 1.0
+            elif state.winner is None:
+                points += 0.5
+            for _ in range(played):
+                state.undo()
+        return points
+
+    def end_stats(self, stats, board):
+        stats.source = 'mcts'
+        stats.nodes = self.nodes
+        stats.cache_hits = 1 if self.reused else 0
+        line = []
+        node = self.root
+        while node is not None:
+            line.append(node.square)
+            if not node.children:
+                break
+            node = max(node.children.values(), key=lambda child: child.visits)
+        stats.max_depth = len(line)
+        size = len(board)
+        stats.principal_variation = [divmod(square, size) for square in line] or [stats.move]
@@ -0,0 +1,535 @@
+import math
+import random
+from .bot_interface import BotInterface
+from engine.bitboard import Bitboard, FULL_MASK, WINNING, squares
+from engine.lookup import get_table
+from engine.nboard import Board
+from engine.search import IterativeDeepeningSearch, ParallelSearch
+from engine.tablebase import find_tablebase
+from engine.transposition import TranspositionTable, board_symmetries, canonical_key, shared_table
+
+# Static move ordering: center, then corners, then edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+WIN_SCORE = 10
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Softmax temperature over the ranked move values at each difficulty, 0 always
+# plays the best move. Calibrated against perfect play with
+# ``python tournament.py --calibrate``: easy loses 43% of its games as X and
+# 69% as O, medium 9% and 26%, hard never loses.
+TEMPERATURE = {
+    'easy': 4.0,
+    'medium': 2.0,
+    'hard': 0.0,
+}
+
+class MinimaxBot(BotInterface):
+    bot_type = 'minimax'  # name create_bot knows this bot by
+    # Solved positions are shared by every MinimaxBot in the process
+    table = shared_table
+
+    def __init__(self, difficulty='medium', table=None, search='alphabeta', use_lookup=True,
+                 win_length=None, time_budget=1.0, temperature=None, workers=1):
+        super().__init__(difficulty)
+        # Skill level: how far move choice strays from the best move
+        if temperature is None:
+            temperature = TEMPERATURE.get(self.difficulty, 0.0)
+        self.temperature = temperature
+        if table is not None:
+            self.table = table
+        if search not in ('alphabeta', 'minimax'):
+            raise ValueError("Invalid search. Use 'alphabeta' or 'minimax'")
+        self.search = search
+        # Answer from the precomputed perfect-play table instead of searching
+        self.use_lookup = use_lookup
+
+        # Boards other than 3x3 three-in-a-row use the iterative deepening search
+        self.win_length = win_length
+        self.time_budget = time_budget
+        # More than one worker searches N x N boards in that many processes
+        self.workers = workers
+        # Search of each (size, win_length) board seen, and the one the last move used
+        self.searchers = {}
+        self.searcher = None
+
+        # Move ordering state learned from earlier cutoffs
+        self.history = [0] * 9
+        self.killers = [None] * 10
+
+        # Counters of the last move, reported to observers
+        self.nodes = 0
+        self.cutoffs = 0
+        self.max_depth = 0
+        self.source = None
+
+        # Replies found while pondering, keyed by the position they answer
+        self.ponder_cache = {}
+        # Moves get_moves answered, keyed by canonical position
+        self.answers = TranspositionTable(1 << 12)
+
+    def choose_move(self, board):
+        """Get the next move based on difficulty level"""
+        if self.temperature > 0:
+            return self._get_sampled_move(board)
+        if self.use_lookup and self._is_standard(board):
+            move = self._get_lookup_move(board)
+            if move is not None:
+                return move
+        return self._get_minimax_move(board)
+
+    def get_moves(self, boards):
+        """
+        Moves for many boards, in order, e.g. from games hosted side by side.
+        Boards holding the same position up to rotation or reflection are
+        answered once: each distinct position is solved on its canonical
+        image, from the answer cache when an earlier batch already solved
+        it, and the move is mapped back onto every board that asked. Sampled
+        difficulties rank the position once and draw a move per board.
+        """
+        groups = {}  # canonical cells -> [(index, symmetry)]
+        for index, board in enumerate(boards):
+            cells, symmetry = self._canonical_cells(board)
+            groups.setdefault(cells, []).append((index, symmetry))
+
+        moves = [None] * len(boards)
+        for cells, members in groups.items():
+            size = len(boards[members[0][0]])
+            image = [[(None, 1, 0)[cells[row * size + col]] for col in range(size)]
+                     for row in range(size)]
+            if self.temperature > 0:
+                ranked = self.rank_moves(image)
+                answers = [self._sample(ranked) for _ in members]
+            else:
+                move = self.answers.get(cells)
+                if move is None:
+                    move = self.get_move(image)
+                    if move is not None:
+                        self.answers.put(cells, move)
+                answers = [move] * len(members)
+            perms = board_symmetries(size)
+            for (index, symmetry), move in zip(members, answers):
+                if move is not None:
+                    # The image's square came from the board square that symmetry maps onto it
+                    square = perms[symmetry].index(move[0] * size + move[1])
+                    moves[index] = divmod(square, size)
+        return moves
+
+    def _canonical_cells(self, board):
+        """Smallest image of ``board`` over its 8 symmetries as a flat tuple (0 empty, 1 X, 2 O), and its symmetry"""
+        size = len(board)
+        codes = {None: 0, 1: 1, 0: 2}
+        flat = [codes[self._cell_value(cell)] for row in board for cell in row]
+        best, best_symmetry = None, 0
+        for symmetry, perm in enumerate(board_symmetries(size)):
+            image = [0] * (size * size)
+            for square, cell in enumerate(flat):
+                image[perm[square]] = cell
+            image = tuple(image)
+            if best is None or image < best:
+                best, best_symmetry = image, symmetry
+        return best, best_symmetry
+
+    def _get_sampled_move(self, board):
+        """Sample a move from the ranked list, weighting each by exp(value / temperature)"""
+        return self._sample(self.rank_moves(board))
+
+    def _sample(self, ranked):
+        if not ranked:
+            return None
+        best = ranked[0][0]
+        weights = [math.exp((value - best) / self.temperature) for value, _ in ranked]
+        return random.choices([move for _, move in ranked], weights)[0]
+
+    def rank_moves(self, board):
+        """
+        Every legal move as (value, (row, col)), best first. On the 3x3 board
+        the values are exact depth-aware scores (a win in n plies is 10 - n),
+        read from the perfect-play table or a full-window search. Larger
+        boards are too big to solve, so their candidate moves are ranked by
+        the one-ply heuristic and valued by rank (0, -1, -2, ...).
+        """
+        if not self._is_standard(board):
+            return self._rank_heuristic(board)
+        state = Bitboard.from_matrix(board)
+        if state.x_to_move():
+            me, opp = state.x, state.o
+        else:
+            me, opp = state.o, state.x
+        if state.winner() is not None:
+            return []
+
+        table = None
+        if self.use_lookup:
+            try:
+                table = get_table()
+            except (OSError, ValueError):
+                self.use_lookup = False
+        self._reset_counters('lookup' if table is not None else 'search')
+        self.history = [0] * 9
+        self.killers = [None] * 10
+
+        ranked = []
+        for square in squares(FULL_MASK & ~(me | opp)):
+            after = me | 1 << square
+            if table is not None:
+                if WINNING[after]:
+                    value = WIN_SCORE - 1
+                else:
+                    x, o = (after, opp) if state.x_to_move() else (opp, after)
+                    value = -table.probe(x, o)[1]
+                    # One ply further from the result, as the search scores it
+                    value -= (value > 0) - (value < 0)
+            else:
+                value = self._alphabeta(after, opp, 1, float('-inf'), float('inf'), False)
+            ranked.append((value, divmod(square, 3)))
+        ranked.sort(key=lambda item: -item[0])
+        return ranked
+
+    def _rank_heuristic(self, board):
+        state = Board.from_matrix(board, self.win_length)
+        self._reset_counters('heuristic')
+        if state.is_over():
+            return []
+        scored = []
+        for square in state.candidate_moves():
+            state.play(square)
+            won = state.winner is not None
+            scored.append((won, -state.evaluate(), square))
+            state.undo()
+        scored.sort(key=lambda item: (not item[0], -item[1]))
+        return [(-rank, divmod(square, state.size)) for rank, (_, _, square) in enumerate(scored)]
+
+    def _is_standard(self, board):
+        """True for the 3x3 three-in-a-row game the bitboard search handles"""
+        return len(board) == 3 and self.win_length in (None, 3)
+
+    def _get_lookup_move(self, board):
+        """Read the best move from the perfect-play table, None if it is unavailable"""
+        try:
+            table = get_table()
+        except (OSError, ValueError):
+            self.use_lookup = False
+            return None
+        state = Bitboard.from_matrix(board)
+        square, _ = table.probe(state.x, state.o)
+        self._reset_counters('lookup')
+        return None if square is None else divmod(square, 3)
+
+    def _get_minimax_move(self, board):
+        """Get the best move using the configured search"""
+        pondered = self.ponder_cache.get(self._position_key(board))
+        if pondered is not None:
+            self._reset_counters('ponder')
+            return pondered
+        if not self._is_standard(board):
+            return self._get_search_move(board)
+
+        state = Bitboard.from_matrix(board)
+        # The bot plays whichever side is to move, X moves first
+        if state.x_to_move():
+            me, opp = state.x, state.o
+        else:
+            me, opp = state.o, state.x
+
+        self._reset_counters('search')
+        # Ordering state starts fresh so the chosen move depends only on the position
+        self.history = [0] * 9
+        self.killers = [None] * 10
+        best_val = float('-inf')
+        best_move = None
+        empty = FULL_MASK & ~(me | opp)
+
+        if self.search == 'alphabeta':
+            for square in self._ordered_moves(empty, 0):
+                move_val = self._alphabeta(me | 1 << square, opp, 1, best_val, float('inf'), False)
+                if move_val > best_val:
+                    best_move = divmod(square, 3)
+                    best_val = move_val
+        else:
+            for square in squares(empty):
+                move_val = self._minimax(me | 1 << square, opp, 1, False)
+                if move_val > best_val:
+                    best_move = divmod(square, 3)
+                    best_val = move_val
+
+        return best_move
+
+    def _get_search_move(self, board):
+        """Iterative deepening search within the time budget, for N x N boards"""
+        state = Board.from_matrix(board, self.win_length)
+        self._ensure_searcher(state)
+        # Pondering sets its own stop event on the searcher, get_move's replaces it for this move
+        previous = self.searcher.stop_event
+        if self.stop_event is not None:
+            self.searcher.stop_event = self.stop_event
+        try:
+            square, _ = self.searcher.search(state)
+        finally:
+            self.searcher.stop_event = previous
+        self.nodes = self.searcher.nodes
+        self.cutoffs = self.searcher.cutoffs
+        self.max_depth = self.searcher.depth_reached
+        self.source = 'search'
+        return None if square is None else divmod(square, state.size)
+
+    def _ensure_searcher(self, state):
+        """Select the board's search, created on first use and probing its generated tablebase if there is one"""
+        key = (state.size, state.win_length)
+        searcher = self.searchers.get(key)
+        if searcher is None:
+            tablebase = find_tablebase(state.size, state.win_length)
+            if self.workers != 1:
+                searcher = ParallelSearch(self.time_budget, tablebase=tablebase, workers=self.workers)
+            else:
+                searcher = IterativeDeepeningSearch(self.time_budget, tablebase=tablebase)
+            self.searchers[key] = searcher
+        self.searcher = searcher
+
+    def close(self):
+        """Stop the worker processes of the parallel searches"""
+        for key, searcher in list(self.searchers.items()):
+            if isinstance(searcher, ParallelSearch):
+                searcher.close()
+                del self.searchers[key]
+                if searcher is self.searcher:
+                    self.searcher = None
+
+    def ponder(self, board, stop_event=None):
+        """
+        Search the bot's reply to each opponent move on ``board`` ahead of time,
+        most likely first, until ``stop_event`` is set. Meant to run in the
+        background while the opponent thinks; get_move then answers any
+        pondered position straight from the cache.
+        """
+        self.ponder_cache = {}
+        if self.temperature > 0:
+            return  # sampled moves only need a cheap ranking
+        grid = [[self._cell_value(cell) for cell in row] for row in board]
+        size = len(grid)
+        x_count = sum(row.count(1) for row in grid)
+        o_count = sum(row.count(0) for row in grid)
+        opponent = 1 if x_count == o_count else 0
+
+        if self._is_standard(grid):
+            replies = [square for square in MOVE_ORDER if grid[square // 3][square % 3] is None]
+        else:
+            state = Board.from_matrix(grid, self.win_length)
+            self._ensure_searcher(state)
+            replies = state.candidate_moves()
+            # The opponent's best move from the last search is the most likely one
+            entry = self.searcher.table.get(state.hash)
+            if entry is not None and entry[3] in replies:
+                replies.remove(entry[3])
+                replies.insert(0, entry[3])
+            self.searcher.stop_event = stop_event
+
+        try:
+            for square in replies:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                row, col = divmod(square, size)
+                grid[row][col] = opponent
+                move = self._get_minimax_move([cells[:] for cells in grid])
+                # An interrupted search is not trustworthy, so only keep finished ones
+                if stop_event is None or not stop_event.is_set():
+                    self.ponder_cache[self._position_key(grid)] = move
+                grid[row][col] = None
+        finally:
+            if self.searcher is not None:
+                self.searcher.stop_event = None
+
+    def has_pondered(self, board):
+        """True when get_move can answer ``board`` from the ponder cache"""
+        return self._position_key(board) in self.ponder_cache
+
+    def _cell_value(self, cell):
+        """Normalize either board layout to 1 (X), 0 (O) or None"""
+        if cell == 1 or cell == 'X':
+            return 1
+        if cell == 0 or cell == 'O':
+            return 0
+        return None
+
+    def _position_key(self, board):
+        return tuple(self._cell_value(cell) for row in board for cell in row)
+
+    def _reset_counters(self, source):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.max_depth = 0
+        self.source = source
+
+    def begin_stats(self, stats):
+        self._cache_start = self._cache_counts()
+
+    def end_stats(self, stats, board):
+        hits, misses = self._cache_counts()
+        stats.cache_hits = hits - self._cache_start[0]
+        stats.cache_misses = misses - self._cache_start[1]
+        stats.source = self.source
+        stats.nodes = self.nodes
+        stats.cutoffs = self.cutoffs
+        stats.max_depth = self.max_depth
+        if stats.move is not None and self.source != 'heuristic':
+            stats.principal_variation = self._principal_variation(board, stats.move)
+
+    def _cache_counts(self):
+        hits, misses = self.table.hits, self.table.misses
+        for searcher in self.searchers.values():
+            hits += searcher.table.hits
+            misses += searcher.table.misses
+        return hits, misses
+
+    def _principal_variation(self, board, move):
+        """Expected line of play starting with ``move``, only built for observers"""
+        line = [move]
+        if self._is_standard(board):
+            # Every searched line matches perfect play, which the lookup table holds
+            try:
+                table = get_table()
+            except (OSError, ValueError):
+                return line
+            state = Bitboard.from_matrix(board)
+            state.place(move[0] * 3 + move[1], state.x_to_move())
+            while True:
+                square, _ = table.probe(state.x, state.o)
+                if square is None:
+                    return line
+                line.append(divmod(square, 3))
+                state.place(square, state.x_to_move())
+
+        if self.searcher is None:
+            return line
+        state = Board.from_matrix(board, self.win_length)
+        state.play(move[0] * state.size + move[1])
+        while not state.is_over() and len(line) <= self.searcher.depth_reached:
+            entry = self.searcher.table.get(state.hash)
+            if entry is None or entry[3] is None:
+                break
+            line.append(divmod(entry[3], state.size))
+            state.play(entry[3])
+        return line
+
+    @classmethod
+    def set_table_size(cls, max_size):
+        """Bound the number of positions kept in the shared transposition table"""
+        cls.table.resize(max_size)
+
+    def _minimax(self, me, opp, depth, is_maximizing):
+        """Minimax algorithm implementation on the bot's and opponent's bitmasks"""
+        self.nodes += 1
+        score = self._evaluate(me, opp, depth)
+        
+        # If we have a winner or draw
+        if score is not None:
+            if depth > self.max_depth:
+                self.max_depth = depth
+            return score
+
+        # Symmetric positions share one entry, the flag tells whose turn it is
+        key = canonical_key(me, opp) << 1 | is_maximizing
+        entry = self.table.get(key)
+        if entry is not None and entry[1] == EXACT:
+            return self._from_table(entry[0], depth)
+
+        empty = FULL_MASK & ~(me | opp)
+        if is_maximizing:
+            best = float('-inf')
+            for square in squares(empty):
+                best = max(best, self._minimax(me | 1 << square, opp, depth + 1, False))
+        else:
+            best = float('inf')
+            for square in squares(empty):
+                best = min(best, self._minimax(me, opp | 1 << square, depth + 1, True))
+
+        self.table.put(key, (self._to_table(best, depth), EXACT))
+        return best
+
+    def _alphabeta(self, me, opp, depth, alpha, beta, is_maximizing):
+        """Minimax with alpha-beta pruning and killer/history move ordering"""
+        self.nodes += 1
+        score = self._evaluate(me, opp, depth)
+        if score is not None:
+            if depth > self.max_depth:
+                self.max_depth = depth
+            return score
+
+        key = canonical_key(me, opp) << 1 | is_maximizing
+        entry = self.table.get(key)
+        if entry is not None:
+            value = self._from_table(entry[0], depth)
+            flag = entry[1]
+            if (flag == EXACT or (flag == LOWER and value >= beta)
+                    or (flag == UPPER and value <= alpha)):
+                return value
+
+        alpha_orig, beta_orig = alpha, beta
+        empty = FULL_MASK & ~(me | opp)
+        if is_maximizing:
+            best = float('-inf')
+            for square in self._ordered_moves(empty, depth):
+                best = max(best, self._alphabeta(me | 1 << square, opp, depth + 1, alpha, beta, False))
+                alpha = max(alpha, best)
+                if alpha >= beta:
+                    self._record_cutoff(square, depth)
+                    break
+        else:
+            best = float('inf')
+            for square in self._ordered_moves(empty, depth):
+                best = min(best, self._alphabeta(me, opp | 1 << square, depth + 1, alpha, beta, True))
+                beta = min(beta, best)
+                if alpha >= beta:
+                    self._record_cutoff(square, depth)
+                    break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(key, (self._to_table(best, depth), flag))
+        return best
+
+    def _ordered_moves(self, empty, depth):
+        """Free squares ordered killer first, then by history, then center/corners/edges"""
+        killer = self.killers[depth]
+        history = self.history
+        moves = [square for square in MOVE_ORDER if empty >> square & 1]
+        moves.sort(key=lambda square: (square != killer, -history[square]))
+        return moves
+
+    def _record_cutoff(self, square, depth):
+        self.cutoffs += 1
+        self.killers[depth] = square
+        # Cutoffs near the root prune more, so they weigh more
+        self.history[square] += 1 << (9 - depth)
+
+    def _to_table(self, score, depth):
+        """Store win/loss scores relative to the node so they are valid at any depth"""
+        if score > 0:
+            return score + depth
+        if score < 0:
+            return score - depth
+        return score
+
+    def _from_table(self, score, depth):
+        if score > 0:
+            return score - depth
+        if score < 0:
+            return score + depth
+        return score
+
+    def _evaluate(self, me, opp, depth=0):
+        """
+        Evaluate the position from the bot's side. Wins score higher the sooner
+        they happen and losses the later, draws are 0 and ongoing games None.
+        """
+        if WINNING[me]:
+            return WIN_SCORE - depth
+        if WINNING[opp]:
+            return depth - WIN_SCORE
+        return 0 if me | opp == FULL_MASK else None
@@ -0,0 +1,228 @@
+"""
+Tabular reinforcement-learning bot for the 3x3 game.
+
+The bot learns an afterstate value for every canonical position: the
+expected result (+1 win, 0 draw, -1 loss) for the player who just moved
+into it. Positions are reduced across the 8 board symmetries and indexed by
+their base-3 encoding, so the whole table is 3**9 float32 values (77 KB).
+It is saved with a small header and opened through mmap on first use,
+and a move is one table read per legal square. The table is built by
+running this module; when it is missing, the first move trains it (several
+seconds) and says so on stderr.
+
+Training is Q-learning on afterstates: self-play follows an epsilon-greedy
+policy and each afterstate is moved towards the negated value of the
+opponent's best reply. Episodes run in parallel workers, each on its own
+copy of the table, and the round's updates are averaged back.
+
+    python -m bots.rl_bot --episodes 200000 --workers 4
+"""
+import argparse
+import mmap
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+from .bot_interface import BotInterface
+from engine.bitboard import FULL_MASK, WINNING, squares
+from engine.lookup import position_index
+from engine.transposition import canonical_key
+
+MAGIC = b'TTRL'
+POSITIONS = 3 ** 9
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rl_values.bin')
+
+# Chance of a random move at each difficulty
+EXPLORATION = {
+    'easy': 0.5,
+    'medium': 0.2,
+    'hard': 0.0,
+}
+
+_index_cache = {}
+
+
+def state_index(mover, other):
+    """Table slot of the afterstate where ``mover`` just played, shared by all its symmetries"""
+    key = mover << 9 | other
+    index = _index_cache.get(key)
+    if index is None:
+        canon = canonical_key(mover, other)
+        index = _index_cache[key] = position_index(canon >> 9, canon & FULL_MASK)
+    return index
+
+
+def _best_reply_value(values, to_move, other):
+    """Value of the best move for ``to_move``, from its own point of view"""
+    best = -2.0
+    for square in squares(FULL_MASK & ~(to_move | other)):
+        after = to_move | 1 << square
+        if WINNING[after]:
+            return 1.0
+        value = values[state_index(after, other)]
+        if value > best:
+            best = value
+    return best
+
+
+def _play_episodes(task):
+    """Worker: play self-play episodes on a copy of the table, return the updated copy"""
+    values, episodes, epsilon, alpha, seed = task
+    rng = random.Random(seed)
+    for _ in range(episodes):
+        mover, other = 0, 0  # the side to move and its opponent
+        while True:
+            empty = list(squares(FULL_MASK & ~(mover | other)))
+            if rng.random() < epsilon:
+                square = rng.choice(empty)
+            else:
+                square = max(empty, key=lambda s: 1.0 if WINNING[mover | 1 << s]
+                             else values[state_index(mover | 1 << s, other)])
+            mover |= 1 << square
+            index = state_index(mover, other)
+            if WINNING[mover]:
+                target = 1.0
+            elif mover | other == FULL_MASK:
+                target = 0.0
+            else:
+                target = -_best_reply_value(values, other, mover)
+            values[index] += alpha * (target - values[index])
+            if WINNING[mover] or mover | other == FULL_MASK:
+                break
+            mover, other = other, mover
+    return values
+
+
+def train(episodes=200000, workers=None, rounds=20, epsilon=0.3, alpha=0.5, seed=0,
+          path=DEFAULT_PATH, verbose=False):
+    """Train by parallel self-play and save the table to ``path``"""
+    from concurrent.futures import ProcessPoolExecutor  # only training needs worker processes
+
+    workers = workers or os.cpu_count() or 1
+    values = array('f', bytes(4 * POSITIONS))
+    per_task = max(1, episodes // (rounds * workers))
+    start = time.perf_counter()
+    # One worker plays in this process, so training also works where forking is unwelcome
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    run = pool.map if pool is not None else map
+    try:
+        for round_index in range(rounds):
+            tasks = [(values, per_task, epsilon, alpha, seed * 1000003 + round_index * workers + w)
+                     for w in range(workers)]
+            results = list(run(_play_episodes, tasks))
+            # Average every worker's change into the table
+            merged = array('f', values)
+            for result in results:
+                for i, (new, old) in enumerate(zip(result, values)):
+                    if new != old:
+                        merged[i] += (new - old) / workers
+            values = merged
+            if verbose:
+                print(f"round {round_index + 1}/{rounds}: {(round_index + 1) * per_task * workers} "
+                      f"episodes, {time.perf_counter() - start:.1f}s", flush=True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    save(values, path)
+    return values
+
+
+def save(values, path=DEFAULT_PATH):
+    # A temporary file of its own, as server threads may train the table at the same time
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            values.tofile(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ValueTable:
+    """Read-only float32 view of a saved table through mmap"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC or len(self.data) != len(MAGIC) + 4 * POSITIONS:
+            self.data.close()
+            raise ValueError(f"{path} is not a trained RL table")
+        self.values = memoryview(self.data)[len(MAGIC):].cast('f')
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+
+_loaded = {}
+
+
+def get_values(path=DEFAULT_PATH):
+    """Open the table at ``path`` once per process, training it first if it is missing"""
+    table = _loaded.get(path)
+    if table is None:
+        if not os.path.exists(path):
+            print(f"Training the RL bot's value table into {path}, this only happens once "
+                  f"(run 'python -m bots.rl_bot' to build it ahead of time)...", file=sys.stderr, flush=True)
+            train(workers=1, path=path)
+        table = _loaded[path] = ValueTable(path)
+    return table
+
+
+class RLBot(BotInterface):
+    bot_type = 'rl'  # name create_bot knows this bot by
+    def __init__(self, difficulty='medium', path=DEFAULT_PATH):
+        super().__init__(difficulty)
+        self.path = path
+        self.epsilon = EXPLORATION.get(self.difficulty, 0.0)
+        self.values = None  # loaded on the first move
+
+    def choose_move(self, board):
+        """Greedy move on the learned values, random with probability epsilon"""
+        if len(board) != 3 or any(len(row) != 3 for row in board):
+            raise ValueError("The RL bot only plays the 3x3 game")
+        if self.values is None:
+            self.values = get_values(self.path)
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == 1 or cell == 'X':
+                    x |= 1 << (i * 3 + j)
+                elif cell == 0 or cell == 'O':
+                    o |= 1 << (i * 3 + j)
+        # X moves first, so X is to move when the counts are equal
+        if bin(x).count('1') == bin(o).count('1'):
+            mover, other = x, o
+        else:
+            mover, other = o, x
+        empty = list(squares(FULL_MASK & ~(mover | other)))
+        if not empty:
+            return None
+        if random.random() < self.epsilon:
+            return divmod(random.choice(empty), 3)
+        values = self.values
+        square = max(empty, key=lambda s: 1.0 if WINNING[mover | 1 << s]
+                     else values[state_index(mover | 1 << s, other)])
+        return divmod(square, 3)
+
+    def end_stats(self, stats, board):
+        stats.source = 'rl'
+        stats.nodes = sum(row.count(None) + row.count(' ') for row in board)  # one read per square
+        stats.principal_variation = [stats.move]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the RL bot by self-play")
+    parser.add_argument('--episodes', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=DEFAULT_PATH)
+    args = parser.parse_args()
+    train(args.episodes, args.workers, args.rounds, seed=args.seed, path=args.out, verbose=True)
+    print(f"Saved to {args.out}")
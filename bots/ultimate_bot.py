@@ -0,0 +1,71 @@
+from .bot_interface import BotInterface
+from engine.search import IterativeDeepeningSearch
+from engine.ultimate import SIZE
+
+# Seconds of search per move, and the deepest search, at each difficulty
+TIME_BUDGET = {
+    'easy': 0.1,
+    'medium': 0.5,
+    'hard': 2.0,
+}
+MAX_DEPTH = {
+    'easy': 1,
+    'medium': 3,
+    'hard': None,
+}
+
+
+class UltimateBot(BotInterface):
+    """
+    Plays ultimate tic-tac-toe with the iterative deepening alpha-beta
+    search, stopping when ``time_budget`` seconds are used up.
+
+    The position is not readable from the 9x9 grid alone, as the last move
+    decides where the next one goes, so get_move takes the game's
+    engine.ultimate.UltimateBoard and returns the (row, col) of the grid.
+    """
+    bot_type = 'ultimate'  # name create_bot knows this bot by
+
+    def __init__(self, difficulty='medium', time_budget=None, max_depth=None):
+        super().__init__(difficulty)
+        if time_budget is None:
+            time_budget = TIME_BUDGET.get(self.difficulty, TIME_BUDGET['hard'])
+        if max_depth is None:
+            max_depth = MAX_DEPTH.get(self.difficulty)
+        self.time_budget = time_budget
+        self.searcher = IterativeDeepeningSearch(time_budget, max_depth)
+
+    def choose_move(self, board):
+        """Search a copy of ``board`` within the time budget"""
+        self.searcher.stop_event = self.stop_event
+        try:
+            square, _ = self.searcher.search(board.copy())
+        finally:
+            self.searcher.stop_event = None
+        return None if square is None else divmod(square, SIZE)
+
+    def begin_stats(self, stats):
+        self._cache_start = (self.searcher.table.hits, self.searcher.table.misses)
+
+    def end_stats(self, stats, board):
+        stats.source = 'search'
+        stats.nodes = self.searcher.nodes
+        stats.cutoffs = self.searcher.cutoffs
+        stats.max_depth = self.searcher.depth_reached
+        stats.cache_hits = self.searcher.table.hits - self._cache_start[0]
+        stats.cache_misses = self.searcher.table.misses - self._cache_start[1]
+        if stats.move is not None:
+            stats.principal_variation = self._principal_variation(board, stats.move)
+
+    def _principal_variation(self, board, move):
+        """Expected line of play starting with ``move``, from the search's table"""
+        line = [move]
+        state = board.copy()
+        state.play(move[0] * SIZE + move[1])
+        while not state.is_over() and len(line) <= self.searcher.depth_reached:
+            entry = self.searcher.table.get(state.hash)
+            if entry is None or entry[3] is None or not state.is_legal(entry[3]):
+                break
+            line.append(divmod(entry[3], SIZE))
+            state.play(entry[3])
+        return line
@@ -0,0 +1,91 @@
+"""
+Vectorized classification of many 3x3 boards at once with NumPy.
+
+Boards come either as an (M, 9) int8 array with 0 for empty, 1 for X and
+2 for O, or as packed bitboards: an (M,) integer array holding
+``x << 9 | o`` (the same packing as engine.transposition keys). All tables
+are built from engine.bitboard and engine.transposition, so the results
+match evaluate_bits, matrix.check_win and MinimaxBot._evaluate exactly.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .bitboard import FULL_MASK, WINNING
+from .transposition import TRANSFORMS
+
+EMPTY, X, O = 0, 1, 2
+
+# Status codes, the same values evaluate_bits returns with None as ONGOING
+X_WIN, O_WIN, DRAW, ONGOING = 1, 0, -1, -2
+
+_WINNING = np.array(WINNING, dtype=bool)
+_TRANSFORMS = np.array(TRANSFORMS, dtype=np.int32)
+_SQUARE_BITS = (1 << np.arange(9)).astype(np.int32)
+
+BatchResult = namedtuple('BatchResult', ['status', 'legal', 'canonical', 'symmetry'])
+
+
+def pack(cells):
+    """(M, 9) int8 cells -> (M,) int32 packed ``x << 9 | o``"""
+    cells = np.asarray(cells)
+    x = ((cells == X) * _SQUARE_BITS).sum(axis=1, dtype=np.int32)
+    o = ((cells == O) * _SQUARE_BITS).sum(axis=1, dtype=np.int32)
+    return x << 9 | o
+
+
+def unpack(packed):
+    """(M,) packed bitboards -> (M, 9) int8 cells"""
+    packed = np.asarray(packed, dtype=np.int32)
+    x = (packed[:, None] >> 9) & _SQUARE_BITS
+    o = packed[:, None] & _SQUARE_BITS
+    cells = np.zeros((len(packed), 9), dtype=np.int8)
+    cells[x != 0] = X
+    cells[o != 0] = O
+    return cells
+
+
+def split(boards):
+    """Return the X and O masks of a batch given in either layout"""
+    boards = np.asarray(boards)
+    packed = pack(boards) if boards.ndim == 2 else boards.astype(np.int32)
+    return packed >> 9 & FULL_MASK, packed & FULL_MASK
+
+
+def status(x, o):
+    """Per-board X_WIN, O_WIN, DRAW or ONGOING"""
+    full = (x | o) == FULL_MASK
+    result = np.full(len(x), ONGOING, dtype=np.int8)
+    result[full] = DRAW
+    result[_WINNING[o]] = O_WIN
+    result[_WINNING[x]] = X_WIN
+    return result
+
+
+def legal_moves(x, o, board_status=None):
+    """Per-board 9-bit mask of playable squares, 0 once the game is over"""
+    if board_status is None:
+        board_status = status(x, o)
+    legal = (FULL_MASK & ~(x | o)).astype(np.uint16)
+    legal[board_status != ONGOING] = 0
+    return legal
+
+
+def canonical(x, o):
+    """Canonical packed key and symmetry index of each board, as transposition.canonical"""
+    keys = _TRANSFORMS[:, x] << 9 | _TRANSFORMS[:, o]  # (8, M)
+    symmetry = keys.argmin(axis=0)
+    return keys[symmetry, np.arange(len(x))], symmetry.astype(np.int8)
+
+
+def classify(boards):
+    """Status, legal-move mask, canonical key and symmetry index for every board"""
+    x, o = split(boards)
+    board_status = status(x, o)
+    key, symmetry = canonical(x, o)
+    return BatchResult(board_status, legal_moves(x, o, board_status), key, symmetry)
+
+
+def expand_moves(legal):
+    """(M,) legal-move masks -> (M, 9) bool array"""
+    return (np.asarray(legal, dtype=np.int32)[:, None] & _SQUARE_BITS) != 0
@@ -0,0 +1,165 @@
+"""
+Bitboard representation of the 3x3 board.
+
+Each side is stored as a 9-bit integer where bit ``row * 3 + col`` is set
+when that side owns the square. Win detection is a couple of AND/compare
+operations against the precomputed line masks below instead of building
+row/column/diagonal lists.
+"""
+
+# The 8 winning lines (3 rows, 3 columns, 2 diagonals) as square masks
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+FULL_MASK = 0b111111111
+
+# Line masks passing through each square, so a move only checks its own lines
+LINES_THROUGH = tuple(
+    tuple(mask for mask in WIN_MASKS if mask & (1 << square))
+    for square in range(9)
+)
+
+# WINNING[bits] is True when the side owning ``bits`` has completed a line
+WINNING = tuple(
+    any(bits & mask == mask for mask in WIN_MASKS) for bits in range(1 << 9)
+)
+
+# Values used by the two existing board layouts
+X_CELLS = (1, 'X')
+O_CELLS = (0, 'O')
+
+
+def bit(row, col):
+    """Bit for the square at (row, col)"""
+    return 1 << (row * 3 + col)
+
+
+def squares(bits):
+    """Yield the square indexes set in ``bits``"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def evaluate_bits(x, o):
+    """Return 1 if X has won, 0 if O has won, -1 for a draw, None if ongoing"""
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return 0
+    if x | o == FULL_MASK:
+        return -1
+    return None
+
+
+class Bitboard:
+    """Both sides of a 3x3 board as a pair of bitmasks"""
+    __slots__ = ('x', 'o')
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+
+    @classmethod
+    def from_list(cls, board):
+        """Build from the 1D ' '/'X'/'O' layout used by TicTacToe"""
+        x = o = 0
+        for square, cell in enumerate(board):
+            if cell == 'X':
+                x |= 1 << square
+            elif cell == 'O':
+                o |= 1 << square
+        return cls(x, o)
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """
+        Build from a 2D board. Accepts the None/1/0 layout of the GUI and
+        the ' '/'X'/'O' layout returned by TicTacToe.get_board_2d.
+        """
+        x = o = 0
+        square = 1
+        for row in matrix:
+            for cell in row:
+                if cell is not None:
+                    if cell in X_CELLS:
+                        x |= square
+                    elif cell in O_CELLS:
+                        o |= square
+                square <<= 1
+        return cls(x, o)
+
+    def to_list(self):
+        """Convert to the 1D ' '/'X'/'O' layout"""
+        return ['X' if self.x >> i & 1 else 'O' if self.o >> i & 1 else ' '
+                for i in range(9)]
+
+    def to_matrix(self):
+        """Convert to the 2D None/1/0 layout"""
+        return [[1 if self.x >> (r * 3 + c) & 1 else 0 if self.o >> (r * 3 + c) & 1 else None
+                 for c in range(3)] for r in range(3)]
+
+    def copy(self):
+        return Bitboard(self.x, self.o)
+
+    @property
+    def occupied(self):
+        return self.x | self.o
+
+    def empty_squares(self):
+        """Square indexes that are still free"""
+        return list(squares(FULL_MASK & ~(self.x | self.o)))
+
+    def is_empty(self, square):
+        return not (self.x | self.o) >> square & 1
+
+    def x_to_move(self):
+        """X always moves first, so X is to move when the counts are equal"""
+        return bin(self.x).count('1') == bin(self.o).count('1')
+
+    def place(self, square, is_x):
+        if is_x:
+            self.x |= 1 << square
+        else:
+            self.o |= 1 << square
+
+    def clear(self, square):
+        mask = ~(1 << square)
+        self.x &= mask
+        self.o &= mask
+
+    def wins_through(self, square, is_x):
+        """Check only the lines passing through the square that was just played"""
+        bits = self.x if is_x else self.o
+        for mask in LINES_THROUGH[square]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def winner(self):
+        """1 if X has a line, 0 if O has a line, None otherwise"""
+        if WINNING[self.x]:
+            return 1
+        if WINNING[self.o]:
+            return 0
+        return None
+
+    def is_full(self):
+        return self.x | self.o == FULL_MASK
+
+    def status(self):
+        """Same as evaluate_bits for this board"""
+        return evaluate_bits(self.x, self.o)
+
+    def __eq__(self, other):
+        return isinstance(other, Bitboard) and self.x == other.x and self.o == other.o
+
+    def __hash__(self):
+        return hash((self.x, self.o))
+
+    def __repr__(self):
+        return f"Bitboard(x={self.x:#011b}, o={self.o:#011b})"
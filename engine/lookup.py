@@ -0,0 +1,140 @@
+"""
+Precomputed perfect-play table for the standard 3x3 game.
+
+Every position is indexed by its base-3 encoding (0 empty, 1 X, 2 O per
+square), giving 3**9 = 19683 slots of two bytes each: the best square for
+the side to move (255 when there is none) and the signed game value for
+the side to move. Values follow MinimaxBot's depth-aware scores: a win in
+n plies is 10 - n, a loss in n plies n - 10 and a draw 0. A finished game
+stores -10 when the side to move has lost.
+
+Build the file once with ``python -m engine.lookup``; it is also built on
+first use if it is missing.
+"""
+import mmap
+import os
+import sys
+import tempfile
+
+from .bitboard import FULL_MASK, WINNING, squares
+
+MAGIC = b'TTT1'
+ENTRY_SIZE = 2
+POSITIONS = 3 ** 9
+NO_MOVE = 255
+WIN_SCORE = 10
+
+# Same static ordering as MinimaxBot so ties resolve to center, corners, edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfect_play.bin')
+
+# TERNARY[bits] is the base-3 weight of the squares set in ``bits``
+TERNARY = tuple(sum(3 ** square for square in squares(bits)) for bits in range(1 << 9))
+
+
+def position_index(x, o):
+    """Base-3 index of the position with X on ``x`` and O on ``o``"""
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def _solve(to_move, other, memo):
+    """Negamax value and best square for the side owning ``to_move``"""
+    key = (to_move, other)
+    if key in memo:
+        return memo[key]
+    if WINNING[other]:
+        result = (-WIN_SCORE, NO_MOVE)
+    elif to_move | other == FULL_MASK:
+        result = (0, NO_MOVE)
+    else:
+        best_score, best_move = None, NO_MOVE
+        for square in MOVE_ORDER:
+            if (to_move | other) >> square & 1:
+                continue
+            score = -_solve(other, to_move | 1 << square, memo)[0]
+            # One ply further from the result
+            if score > 0:
+                score -= 1
+            elif score < 0:
+                score += 1
+            if best_score is None or score > best_score:
+                best_score, best_move = score, square
+        result = (best_score, best_move)
+    memo[key] = result
+    return result
+
+
+def build(path=DEFAULT_PATH):
+    """Solve every reachable position and write the table to ``path``"""
+    memo = {}
+    _solve(0, 0, memo)  # X to move on the empty board reaches everything
+
+    data = bytearray(POSITIONS * ENTRY_SIZE)
+    for offset in range(0, len(data), ENTRY_SIZE):
+        data[offset] = NO_MOVE
+
+    for (to_move, other), (score, move) in memo.items():
+        # X is to move when both sides have the same number of pieces
+        if bin(to_move).count('1') == bin(other).count('1'):
+            offset = position_index(to_move, other) * ENTRY_SIZE
+        else:
+            offset = position_index(other, to_move) * ENTRY_SIZE
+        data[offset] = move
+        data[offset + 1] = score & 0xFF
+
+    # A temporary file of its own, as worker processes may build the table at the same time
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(memo)
+
+
+class LookupTable:
+    """Read-only view of a built table through mmap"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC or len(self.data) != len(MAGIC) + POSITIONS * ENTRY_SIZE:
+            self.data.close()
+            raise ValueError(f"{path} is not a perfect-play table")
+
+    def probe(self, x, o):
+        """Return (best_square, score) for the side to move, best_square is None if the game is over"""
+        offset = len(MAGIC) + position_index(x, o) * ENTRY_SIZE
+        move = self.data[offset]
+        score = self.data[offset + 1]
+        if score > 127:
+            score -= 256
+        return (None if move == NO_MOVE else move), score
+
+    def close(self):
+        self.data.close()
+
+
+_loaded = {}
+
+
+def get_table(path=DEFAULT_PATH):
+    """Open the table at ``path`` once per process, building it if it does not exist"""
+    table = _loaded.get(path)
+    if table is None:
+        if not os.path.exists(path):
+            build(path)
+        table = LookupTable(path)
+        _loaded[path] = table
+    return table
+
+
+if __name__ == '__main__':
+    out = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    count = build(out)
+    print(f"Solved {count} positions into {out}")
@@ -0,0 +1,241 @@
+"""
+N x N board with a k-in-a-row win condition.
+
+Every k-long segment of a row, column or diagonal is a "window". The board
+keeps, for each window, how many X and O stones it holds, so a move or an
+undo only touches the windows through that square. The same counters give
+an incrementally maintained heuristic score and O(1) win detection.
+"""
+import random
+
+EMPTY, X, O = 0, 1, 2
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Larger than any heuristic score, so wins always dominate
+WIN_SCORE = 1 << 60
+
+
+def default_win_length(size):
+    """3x3 and 4x4 need the full row, 5x5 uses 4 and bigger boards gomoku's 5"""
+    if size <= 4:
+        return size
+    if size == 5:
+        return 4
+    return 5
+
+
+class _Geometry:
+    """Windows and Zobrist keys for one (size, win_length) pair"""
+
+    def __init__(self, size, win_length):
+        self.windows = []
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in DIRECTIONS:
+                    end_row = row + d_row * (win_length - 1)
+                    end_col = col + d_col * (win_length - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        self.windows.append(tuple(
+                            (row + d_row * i) * size + col + d_col * i for i in range(win_length)
+                        ))
+        # Score of a window holding n stones of one side and none of the other
+        self.weights = (0,) + tuple(8 ** n for n in range(win_length))
+
+        self.through = [[] for _ in range(size * size)]
+        for index, window in enumerate(self.windows):
+            for square in window:
+                self.through[square].append(index)
+
+        # Squares sorted by distance to the center, used for move ordering
+        center = (size - 1) / 2
+        self.by_center = sorted(
+            range(size * size),
+            key=lambda s: max(abs(s // size - center), abs(s % size - center))
+        )
+        self.neighbors = []
+        for square in range(size * size):
+            row, col = divmod(square, size)
+            self.neighbors.append(tuple(
+                r * size + c
+                for r in range(max(0, row - 1), min(size, row + 2))
+                for c in range(max(0, col - 1), min(size, col + 2))
+                if (r, c) != (row, col)
+            ))
+
+        rng = random.Random(size * 1000 + win_length)
+        self.zobrist = [(0, rng.getrandbits(64), rng.getrandbits(64)) for _ in range(size * size)]
+
+
+_geometries = {}
+
+
+def _geometry(size, win_length):
+    geometry = _geometries.get((size, win_length))
+    if geometry is None:
+        geometry = _geometries[(size, win_length)] = _Geometry(size, win_length)
+    return geometry
+
+
+class Board:
+    """N x N board with incrementally updated window counters"""
+
+    def __init__(self, size=3, win_length=None):
+        if win_length is None:
+            win_length = default_win_length(size)
+        if not 1 <= win_length <= size:
+            raise ValueError("win_length must be between 1 and the board size")
+        self.size = size
+        self.win_length = win_length
+        self.geometry = _geometry(size, win_length)
+        self.cells = [EMPTY] * (size * size)
+        self.x_counts = [0] * len(self.geometry.windows)
+        self.o_counts = [0] * len(self.geometry.windows)
+        self.moves = []
+        # Bitmask of each side's stones, indexed by X or O, for tablebase probes
+        self.stones = [0, 0, 0]
+        self.winner = None
+        self.winner_ply = 0  # number of moves on the board when the game was won
+        self.score = 0  # heuristic score from X's point of view
+        self.hash = 0
+
+    @classmethod
+    def from_matrix(cls, matrix, win_length=None):
+        """
+        Build from a 2D board in either the None/1/0 layout of the GUI or
+        the ' '/'X'/'O' layout of TicTacToe.get_board_2d.
+        """
+        board = cls(len(matrix), win_length)
+        for row, cells in enumerate(matrix):
+            for col, cell in enumerate(cells):
+                if cell == 1 or cell == 'X':
+                    board.place(row * board.size + col, True)
+        for row, cells in enumerate(matrix):
+            for col, cell in enumerate(cells):
+                if cell == 0 or cell == 'O':
+                    board.place(row * board.size + col, False)
+        return board
+
+    def to_matrix(self):
+        """Convert to the 2D None/1/0 layout"""
+        size = self.size
+        return [[{EMPTY: None, X: 1, O: 0}[self.cells[r * size + c]] for c in range(size)]
+                for r in range(size)]
+
+    def to_move(self):
+        """X moves first, so X is to move when both sides have as many stones"""
+        return X if len(self.moves) % 2 == 0 else O
+
+    def _apply(self, square, side):
+        through = self.geometry.through[square]
+        x_counts, o_counts = self.x_counts, self.o_counts
+        weights = self.geometry.weights
+        k = self.win_length
+        score = self.score
+        won = False
+        for w in through:
+            xc, oc = x_counts[w], o_counts[w]
+            if side == X:
+                # A window stops counting for O once X enters it
+                if oc == 0:
+                    score += weights[xc + 1] - weights[xc]
+                elif xc == 0:
+                    score += weights[oc]
+                x_counts[w] = xc + 1
+                if xc + 1 == k:
+                    won = True
+            else:
+                if xc == 0:
+                    score -= weights[oc + 1] - weights[oc]
+                elif oc == 0:
+                    score -= weights[xc]
+                o_counts[w] = oc + 1
+                if oc + 1 == k:
+                    won = True
+        self.score = score
+        self.cells[square] = side
+        self.stones[side] |= 1 << square
+        self.hash ^= self.geometry.zobrist[square][side]
+        self.moves.append(square)
+        if won and self.winner is None:
+            self.winner = side
+            self.winner_ply = len(self.moves)
+
+    def play(self, square):
+        """Play the side to move on ``square``"""
+        if self.cells[square] != EMPTY:
+            raise ValueError(f"Square {square} is already taken")
+        self._apply(square, self.to_move())
+
+    def place(self, square, is_x):
+        """Put a stone of the given side, same signature as Bitboard.place"""
+        self._apply(square, X if is_x else O)
+
+    def undo(self):
+        """Take back the last move"""
+        square = self.moves.pop()
+        side = self.cells[square]
+        through = self.geometry.through[square]
+        x_counts, o_counts = self.x_counts, self.o_counts
+        weights = self.geometry.weights
+        score = self.score
+        for w in through:
+            if side == X:
+                xc, oc = x_counts[w] - 1, o_counts[w]
+                if oc == 0:
+                    score -= weights[xc + 1] - weights[xc]
+                elif xc == 0:
+                    score -= weights[oc]
+                x_counts[w] = xc
+            else:
+                xc, oc = x_counts[w], o_counts[w] - 1
+                if xc == 0:
+                    score += weights[oc + 1] - weights[oc]
+                elif oc == 0:
+                    score += weights[xc]
+                o_counts[w] = oc
+        self.score = score
+        self.cells[square] = EMPTY
+        self.stones[side] ^= 1 << square
+        self.hash ^= self.geometry.zobrist[square][side]
+        if self.winner is not None and len(self.moves) < self.winner_ply:
+            self.winner = None
+        return square
+
+    def wins_through(self, square, is_x):
+        """True when a window through ``square`` is complete for the given side"""
+        counts = self.x_counts if is_x else self.o_counts
+        k = self.win_length
+        for w in self.geometry.through[square]:
+            if counts[w] == k:
+                return True
+        return False
+
+    def is_full(self):
+        return len(self.moves) == len(self.cells)
+
+    def is_over(self):
+        return self.winner is not None or len(self.moves) == len(self.cells)
+
+    def empty_squares(self):
+        return [square for square, cell in enumerate(self.cells) if cell == EMPTY]
+
+    def candidate_moves(self):
+        """
+        Empty squares worth searching. Small boards use every empty square,
+        larger ones only squares next to a stone, all sorted center first.
+        """
+        cells = self.cells
+        if self.size <= 5 or not self.moves:
+            return [square for square in self.geometry.by_center if cells[square] == EMPTY]
+        near = set()
+        neighbors = self.geometry.neighbors
+        for square in self.moves:
+            for n in neighbors[square]:
+                if cells[n] == EMPTY:
+                    near.add(n)
+        return [square for square in self.geometry.by_center if square in near]
+
+    def evaluate(self):
+        """Heuristic score from the point of view of the side to move"""
+        return self.score if len(self.moves) % 2 == 0 else -self.score
@@ -0,0 +1,278 @@
+"""
+Append-only binary log of played games.
+
+A file starts with the 4-byte magic and a version byte, followed by blocks
+that each begin with a tag byte:
+
+    SEGMENT  a writer opened the file; the string table starts empty again
+    STRING   varint length + UTF-8 bytes, gets the next string id
+    GAME     one finished (or abandoned) game
+
+Player names and difficulties are written once per segment as STRING
+blocks and referenced by id, so a game costs a dozen bytes of header plus
+its moves. A GAME block holds, as unsigned LEB128 varints unless noted:
+
+    size, win_length (0 for ultimate tic-tac-toe, see engine.ultimate),
+    flags (bit 0: move times follow)
+    X name id, X difficulty id, O name id, O difficulty id
+    seed + 1 (0 when unknown) and start time (unix seconds), both as
+    zigzag deltas from the segment's previous game, duration (ms)
+    result (1 byte: 0 draw, 1 X won, 2 O won, 3 unfinished)
+    move count, then the squares packed at bit_length(size*size - 1) bits
+    each (4 bits on 3x3), then one varint per move time (ms) if flagged
+
+Writers only ever append, several sessions can log to the same file, and
+the reader maps the file and yields one record at a time, so archives far
+larger than memory can be scanned. A record cut short by a crash ends the
+iteration without an error.
+
+    python -m engine.records games.ttg
+"""
+import mmap
+import os
+import sys
+import time
+from collections import namedtuple
+
+MAGIC = b'TTTG'
+VERSION = 1
+
+SEGMENT, STRING, GAME = 0, 1, 2
+DRAW, X_WON, O_WON, UNFINISHED = 0, 1, 2, 3
+HAS_TIMES = 1
+
+GameRecord = namedtuple('GameRecord', ['size', 'win_length', 'players', 'seed', 'started',
+                                       'duration', 'winner', 'finished', 'moves', 'move_times'])
+
+
+def describe_player(player):
+    """(name, difficulty) for the header: 'human' or the bot's create_bot type and difficulty"""
+    if player is None or isinstance(player, str):
+        return (player or 'human', '')
+    return (getattr(player, 'bot_type', type(player).__name__), getattr(player, 'difficulty', ''))
+
+
+def square_bits(size):
+    return max(1, (size * size - 1).bit_length())
+
+
+def _zigzag(value):
+    """Signed -> unsigned so that small deltas of either sign stay one byte"""
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _varint(value, out):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class GameWriter:
+    """
+    Streams games to ``path``. Either hand over a whole game with
+    write_game, or drive it move by move from a game loop:
+
+        writer.begin_game(3, 3, (describe_player(p1), describe_player(p2)))
+        writer.record_move(square, seconds)
+        writer.end_game('X')
+    """
+
+    def __init__(self, path, record_times=True):
+        self.path = path
+        self.record_times = record_times
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path} is not a game record file")
+        self.file = open(path, 'ab')
+        header = bytearray(MAGIC + bytes([VERSION])) if new else bytearray()
+        header.append(SEGMENT)
+        self.file.write(header)
+        self.strings = {}
+        self.current = None
+        # Previous game's seed field and start time, the next game stores deltas
+        self.last_seed = 0
+        self.last_started = 0
+
+    def _string_id(self, text, out):
+        string_id = self.strings.get(text)
+        if string_id is None:
+            string_id = self.strings[text] = len(self.strings)
+            data = text.encode('utf-8')
+            out.append(STRING)
+            _varint(len(data), out)
+            out += data
+        return string_id
+
+    def write_game(self, moves, winner, size=3, win_length=3, players=(('', ''), ('', '')),
+                   seed=None, started=None, duration=None, move_times=None, finished=True):
+        """Append one game; ``winner`` is 'X', 'O' or None, times are in seconds"""
+        out = bytearray()
+        ids = [self._string_id(str(text), out) for player in players for text in player]
+        times = move_times if self.record_times and move_times is not None else None
+
+        seed_field = 0 if seed is None else seed + 1
+        started = int(time.time() if started is None else started)
+        out.append(GAME)
+        for value in (size, win_length, HAS_TIMES if times is not None else 0, *ids,
+                      _zigzag(seed_field - self.last_seed), _zigzag(started - self.last_started),
+                      int(round((duration or 0.0) * 1000))):
+            _varint(value, out)
+        if not finished:
+            out.append(UNFINISHED)
+        else:
+            out.append(X_WON if winner == 'X' else O_WON if winner == 'O' else DRAW)
+        _varint(len(moves), out)
+        bits = square_bits(size)
+        packed = 0
+        for i, square in enumerate(moves):
+            packed |= square << (i * bits)
+        out += packed.to_bytes((len(moves) * bits + 7) // 8, 'little')
+        if times is not None:
+            for seconds in times:
+                _varint(int(round(seconds * 1000)), out)
+        self.file.write(out)
+        self.last_seed, self.last_started = seed_field, started
+
+    def begin_game(self, size=3, win_length=3, players=(('', ''), ('', '')), seed=None):
+        """Start recording a game played move by move, dropping any game left unfinished"""
+        self.current = {'size': size, 'win_length': win_length, 'players': players, 'seed': seed,
+                        'started': time.time(), 'clock': time.perf_counter(),
+                        'moves': [], 'move_times': []}
+
+    def record_move(self, square, seconds=None):
+        if self.current is None:
+            return
+        self.current['moves'].append(square)
+        self.current['move_times'].append(seconds or 0.0)
+
+    def takeback(self):
+        """Drop the last recorded move of the game in progress"""
+        if self.current is not None and self.current['moves']:
+            self.current['moves'].pop()
+            self.current['move_times'].pop()
+
+    def end_game(self, winner, finished=True):
+        """Write and flush the game begun with begin_game; games without moves are not kept"""
+        game, self.current = self.current, None
+        if game is None or not game['moves']:
+            return
+        self.write_game(game['moves'], winner, game['size'], game['win_length'], game['players'],
+                        game['seed'], game['started'], time.perf_counter() - game['clock'],
+                        game['move_times'], finished)
+        self.file.flush()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.current is not None:
+            self.end_game(None, finished=False)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_games(path):
+    """Yield every GameRecord in ``path`` in the order they were written"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIC):
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f"{path} has unsupported version {data[len(MAGIC)]}")
+        yield from _parse(data, len(MAGIC) + 1)
+    finally:
+        data.close()
+
+
+def _parse(data, pos):
+    end = len(data)
+    strings = []
+    seed = started = 0
+
+    def varint():
+        nonlocal pos
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    try:
+        while pos < end:
+            tag = data[pos]
+            pos += 1
+            if tag == SEGMENT:
+                strings = []
+                seed = started = 0
+            elif tag == STRING:
+                length = varint()
+                if pos + length > end:
+                    return
+                strings.append(data[pos:pos + length].decode('utf-8'))
+                pos += length
+            elif tag == GAME:
+                size, win_length, flags = varint(), varint(), varint()
+                ids = [varint() for _ in range(4)]
+                seed += _unzigzag(varint())
+                started += _unzigzag(varint())
+                duration = varint()
+                result = data[pos]
+                pos += 1
+                count = varint()
+                bits = square_bits(size)
+                length = (count * bits + 7) // 8
+                if pos + length > end:
+                    return
+                packed = int.from_bytes(data[pos:pos + length], 'little')
+                pos += length
+                mask = (1 << bits) - 1
+                moves = [packed >> (i * bits) & mask for i in range(count)]
+                move_times = [varint() / 1000 for _ in range(count)] if flags & HAS_TIMES else None
+                players = ((strings[ids[0]], strings[ids[1]]), (strings[ids[2]], strings[ids[3]]))
+                winner = 'X' if result == X_WON else 'O' if result == O_WON else None
+                yield GameRecord(size, win_length, players, seed - 1 if seed else None, started,
+                                 duration / 1000, winner, result != UNFINISHED, moves, move_times)
+            else:
+                raise ValueError(f"Corrupt game record file: unknown tag {tag} at byte {pos - 1}")
+    except IndexError:
+        return  # the last record was cut short
+
+
+def summarize(path):
+    """Count games and results in a record file"""
+    totals = {'games': 0, 'X': 0, 'O': 0, 'draw': 0, 'unfinished': 0, 'moves': 0}
+    for record in read_games(path):
+        totals['games'] += 1
+        totals['moves'] += len(record.moves)
+        if not record.finished:
+            totals['unfinished'] += 1
+        else:
+            totals[record.winner or 'draw'] += 1
+    return totals
+
+
+if __name__ == '__main__':
+    for record_path in sys.argv[1:]:
+        start = time.perf_counter()
+        summary = summarize(record_path)
+        print(f"{record_path}: {summary['games']} games, X {summary['X']}, O {summary['O']}, "
+              f"draws {summary['draw']}, unfinished {summary['unfinished']}, "
+              f"{summary['moves']} moves, read in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,333 @@
+"""
+Iterative deepening alpha-beta search for engine.nboard.Board.
+
+Each iteration searches one ply deeper than the last and reorders the root
+moves by the previous iteration's result. When the wall-clock budget runs
+out the unfinished iteration is thrown away and the best move of the last
+completed one is played. Non-terminal leaves are scored with the board's
+incremental window heuristic, unless an engine.tablebase covers them: a
+position with few enough empty squares is then scored exactly with one
+probe and not searched any further.
+
+ParallelSearch spreads each iteration's root moves over worker processes
+that share one transposition table in shared memory.
+"""
+import os
+import time
+import weakref
+
+from .nboard import O, WIN_SCORE, Board, X
+from .transposition import SharedTranspositionTable, TranspositionTable
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Scores at least this large are forced wins or losses
+MATE_BOUND = WIN_SCORE - 10000
+
+# How many nodes to visit between clock checks
+CHECK_EVERY = 1024
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is used up"""
+
+
+class IterativeDeepeningSearch:
+    def __init__(self, time_budget=1.0, max_depth=None, table_size=1 << 18, tablebase=None,
+                 table=None):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table = TranspositionTable(table_size) if table is None else table
+        # engine.tablebase.Tablebase for this board, or None
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.cutoffs = 0
+        self.tablebase_hits = 0
+        self.depth_reached = 0
+        self.deadline = None
+        # Optional threading.Event that aborts the search like a timeout
+        self.stop_event = None
+
+    def search(self, board):
+        """Return (square, score) for the side to move, square is None if the game is over"""
+        self.nodes = 0
+        self.cutoffs = 0
+        self.tablebase_hits = 0
+        self.depth_reached = 0
+        if board.is_over():
+            return None, 0
+
+        start = time.perf_counter()
+        self.deadline = start + self.time_budget if self.time_budget else None
+        moves = board.candidate_moves()
+        best_move, best_score = moves[0], 0
+        if len(moves) == 1:
+            return best_move, best_score
+
+        max_depth = len(board.cells) - len(board.moves)
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+        # Every reply is scored exactly by the tablebase, one ply decides
+        if self.tablebase is not None and len(board.cells) - len(board.moves) - 1 <= self.tablebase.max_empty:
+            max_depth = 1
+
+        ply_count = len(board.moves)
+        for depth in range(1, max_depth + 1):
+            try:
+                move, score = self._search_root(board, moves, depth)
+            except SearchTimeout:
+                # Put the board back the way the caller gave it to us
+                while len(board.moves) > ply_count:
+                    board.undo()
+                break
+            best_move, best_score = move, score
+            self.depth_reached = depth
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= MATE_BOUND:
+                break
+        return best_move, best_score
+
+    def _search_root(self, board, moves, depth):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move, best_score = moves[0], -WIN_SCORE - 1
+        for square in moves:
+            board.play(square)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            board.undo()
+            if score > best_score:
+                best_move, best_score = square, score
+            alpha = max(alpha, score)
+        return best_move, best_score
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchTimeout()
+
+        # The previous move won, so the side to move has lost
+        if board.winner is not None:
+            return ply - WIN_SCORE
+        if board.is_full():
+            return 0
+        if self.tablebase is not None:
+            score = self._probe(board, ply)
+            if score is not None:
+                return score
+        if depth == 0:
+            return board.evaluate()
+
+        entry = self.table.get(board.hash)
+        tt_move = None
+        if entry is not None:
+            entry_depth, stored, flag, tt_move = entry
+            if entry_depth >= depth:
+                score = self._from_table(stored, ply)
+                if (flag == EXACT or (flag == LOWER and score >= beta)
+                        or (flag == UPPER and score <= alpha)):
+                    return score
+
+        moves = board.candidate_moves()
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        alpha_orig = alpha
+        best_score, best_move = -WIN_SCORE - 1, None
+        for square in moves:
+            board.play(square)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.undo()
+            if score > best_score:
+                best_score, best_move = score, square
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    self.cutoffs += 1
+                    break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(board.hash, (depth, self._to_table(best_score, ply), flag, best_move))
+        return best_score
+
+    def _probe(self, board, ply):
+        """Exact score from the tablebase, None when it does not cover the position"""
+        if len(board.cells) - len(board.moves) > self.tablebase.max_empty:
+            return None
+        value = self.tablebase.probe(board.stones[X], board.stones[O])
+        if value is None:
+            return None
+        self.tablebase_hits += 1
+        # Distance in plies from this node becomes a mate score from the root
+        if value > 0:
+            return WIN_SCORE - (ply + value)
+        if value < 0:
+            return (ply - value) - WIN_SCORE
+        return 0
+
+    def _to_table(self, score, ply):
+        """Store mate scores relative to the node so they are valid at any ply"""
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    def _from_table(self, score, ply):
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+
+# Search of a ParallelSearch worker process and the best root score shared by all workers
+_worker = None
+_root_alpha = None
+
+
+def _init_worker(table_name, slots, tablebase_path, stop_event, root_alpha):
+    global _worker, _root_alpha
+    tablebase = None
+    if tablebase_path is not None:
+        from .tablebase import Tablebase
+        tablebase = Tablebase(tablebase_path)
+    table = SharedTranspositionTable(slots, name=table_name)
+    _worker = IterativeDeepeningSearch(None, table=table, tablebase=tablebase)
+    _worker.stop_event = stop_event
+    _root_alpha = root_alpha
+
+
+def _search_move(task):
+    """
+    Worker: score one root move against the best score any worker has found
+    so far. Returns the score (None if the search was stopped), the alpha it
+    was searched with, and the counters. A score not above that alpha is
+    only an upper bound.
+    """
+    history, size, win_length, square, depth, alpha, beta = task
+    alpha = max(alpha, _root_alpha.value)
+    board = Board(size, win_length)
+    for played in history:
+        board.play(played)
+    board.play(square)
+    searcher = _worker
+    searcher.nodes = searcher.cutoffs = searcher.tablebase_hits = 0
+    try:
+        score = -searcher._negamax(board, depth - 1, -beta, -alpha, 1)
+    except SearchTimeout:
+        score = None
+    if score is not None and score > alpha:
+        with _root_alpha.get_lock():
+            if score > _root_alpha.value:
+                _root_alpha.value = score
+    return score, alpha, searcher.nodes, searcher.cutoffs, searcher.tablebase_hits
+
+
+def _release(resources):
+    pool, table = resources
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+    table.close()
+
+
+class ParallelSearch(IterativeDeepeningSearch):
+    """
+    Iterative deepening with the root moves of every iteration searched in
+    ``workers`` processes. The first move is searched alone to get a bound,
+    then all the others at once; each starts from the best root score found
+    so far by any worker, and every worker reads and fills the same shared
+    transposition table. Which of several equally good moves is played can
+    depend on timing. The pool starts on the first search and is shut down
+    by close() or when the search is collected.
+    """
+
+    def __init__(self, time_budget=1.0, max_depth=None, table_size=1 << 18, tablebase=None,
+                 workers=None):
+        super().__init__(time_budget, max_depth, table=SharedTranspositionTable(table_size),
+                         tablebase=tablebase)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.abort = None
+        self.root_alpha = None
+        self._resources = [None, self.table]
+        self._finalizer = weakref.finalize(self, _release, self._resources)
+
+    def _get_pool(self):
+        if self.pool is None:
+            # Worker processes are only started by the first parallel search
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.abort = multiprocessing.Event()
+            self.root_alpha = multiprocessing.Value('q', 0)
+            tablebase_path = self.tablebase.path if self.tablebase is not None else None
+            self.pool = self._resources[0] = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self.table.name, self.table.slots, tablebase_path, self.abort,
+                          self.root_alpha))
+        return self.pool
+
+    def _search_root(self, board, moves, depth):
+        pool = self._get_pool()
+        history = list(board.moves)
+
+        def submit(square, alpha):
+            task = (history, board.size, board.win_length, square, depth, alpha, WIN_SCORE + 1)
+            return pool.submit(_search_move, task)
+
+        self.root_alpha.value = -WIN_SCORE - 1
+        best_move = moves[0]
+        best_score = self._collect([submit(best_move, -WIN_SCORE - 1)])[0][0]
+        futures = [submit(square, best_score) for square in moves[1:]]
+        for square, (score, alpha) in zip(moves[1:], self._collect(futures)):
+            # A score at or below its alpha is a bound, not the move's value
+            if score > alpha and score > best_score:
+                best_move, best_score = square, score
+        return best_move, best_score
+
+    def _collect(self, futures):
+        """(score, alpha) of ``futures`` in order, raising SearchTimeout if the search had to stop"""
+        from concurrent.futures import wait
+
+        pending = set(futures)
+        stopped = False
+        while pending:
+            timeout = 0.05
+            if self.deadline is not None:
+                timeout = min(timeout, max(0.0, self.deadline - time.perf_counter()))
+            _, pending = wait(pending, timeout=timeout)
+            if pending and not stopped and (
+                    (self.deadline is not None and time.perf_counter() > self.deadline)
+                    or (self.stop_event is not None and self.stop_event.is_set())):
+                # Workers notice within CHECK_EVERY nodes, wait so none outlives this search
+                self.abort.set()
+                stopped = True
+        if stopped:
+            self.abort.clear()
+        results = []
+        for future in futures:
+            score, alpha, nodes, cutoffs, tablebase_hits = future.result()
+            self.nodes += nodes
+            self.cutoffs += cutoffs
+            self.tablebase_hits += tablebase_hits
+            if score is None:
+                stopped = True
+            results.append((score, alpha))
+        if stopped:
+            raise SearchTimeout()
+        return results
+
+    def close(self):
+        """Stop the worker processes and free the shared table"""
+        self._finalizer()
+        self.pool = None
@@ -0,0 +1,140 @@
+"""
+Store for millions of open games with bounded memory.
+
+The most recently used sessions are kept as objects in an LRU. Once there
+are more than ``hot`` of them, the least recently used idle one is packed
+into its record of a memory-mapped spill file, and it is unpacked again on
+its next request. Every session owns one fixed-size record for its
+lifetime:
+
+    in use (1 byte), token (8 bytes), payload length (1 byte), payload
+
+Session ids are the record number followed by the random token, so a
+spilled session is found without any in-memory index and a guessed id is
+rejected. Freed records are reused. The file only grows, doubling when it
+runs out of records.
+"""
+import mmap
+import os
+import tempfile
+from array import array
+from collections import OrderedDict
+
+RECORD_SIZE = 128
+_PAYLOAD = 10  # offset of the payload in a record
+MAX_PAYLOAD = RECORD_SIZE - _PAYLOAD
+
+
+class SessionStore:
+    """
+    Sessions by id. ``unpack`` rebuilds a session from the bytes its pack()
+    returned; sessions whose ``busy`` is true are never spilled. Without a
+    ``path`` the spill file is an anonymous temporary file.
+    """
+
+    def __init__(self, unpack, hot=10000, path=None, initial_records=1024):
+        self.unpack = unpack
+        self.hot_limit = max(1, hot)
+        self.file = open(path, 'w+b') if path is not None else tempfile.TemporaryFile()
+        self.records = 0
+        self.map = None
+        self._grow(max(1, initial_records))
+        self.used = 0  # records handed out so far, free or not
+        self.free = array('I')
+        self.hot = OrderedDict()  # record -> session
+        self.count = 0
+        self.spills = 0
+        self.loads = 0
+
+    def _grow(self, records):
+        if self.map is not None:
+            self.map.close()
+        self.file.truncate(records * RECORD_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), records * RECORD_SIZE)
+        self.records = records
+
+    def add(self, session):
+        """Store a new session and return its id"""
+        if self.free:
+            record = self.free.pop()
+        else:
+            if self.used == self.records:
+                self._grow(self.records * 2)
+            record = self.used
+            self.used += 1
+        token = os.urandom(8)
+        offset = record * RECORD_SIZE
+        self.map[offset:offset + _PAYLOAD] = b'\x01' + token + b'\x00'
+        self.hot[record] = session
+        self.count += 1
+        self._evict(keep=record)
+        return f"{record:08x}{token.hex()}"
+
+    def _record(self, session_id):
+        """Record number of a live session id, None for unknown ids"""
+        try:
+            record, token = int(session_id[:8], 16), bytes.fromhex(session_id[8:])
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= record < self.used or len(token) != 8:
+            return None
+        offset = record * RECORD_SIZE
+        if self.map[offset] != 1 or self.map[offset + 1:offset + 9] != token:
+            return None
+        return record
+
+    def get(self, session_id):
+        """The session, loading it from the spill file if needed, None if there is none"""
+        record = self._record(session_id)
+        if record is None:
+            return None
+        session = self.hot.get(record)
+        if session is not None:
+            self.hot.move_to_end(record)
+            return session
+        offset = record * RECORD_SIZE
+        length = self.map[offset + 9]
+        session = self.unpack(self.map[offset + _PAYLOAD:offset + _PAYLOAD + length])
+        self.loads += 1
+        self.hot[record] = session
+        self._evict(keep=record)
+        return session
+
+    def remove(self, session_id):
+        """Close a session, False if there was none"""
+        record = self._record(session_id)
+        if record is None:
+            return False
+        self.hot.pop(record, None)
+        self.map[record * RECORD_SIZE] = 0
+        self.free.append(record)
+        self.count -= 1
+        return True
+
+    def _evict(self, keep=None):
+        """
+        Spill least recently used idle sessions until the hot set fits. The
+        ``keep`` record is about to be handed out and is never spilled.
+        """
+        while len(self.hot) > self.hot_limit:
+            for record, session in self.hot.items():
+                if record != keep and not session.busy:
+                    break
+            else:
+                return  # every hot session is in the middle of a request
+            data = session.pack()
+            if len(data) > MAX_PAYLOAD:
+                raise ValueError(f"Session of {len(data)} bytes does not fit a {RECORD_SIZE} byte record")
+            offset = record * RECORD_SIZE + 9
+            self.map[offset] = len(data)
+            self.map[offset + 1:offset + 1 + len(data)] = data
+            del self.hot[record]
+            self.spills += 1
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.hot.clear()
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,118 @@
+"""
+Compact state of one game: the board as two bitmasks plus the side to
+move, the winner and the two scores, in a __slots__ object that packs to a
+handful of bytes. A 3x3 game is 11 bytes:
+
+    size, win_length, flags (bit 0: O to move, bits 1-2: winner 0 none,
+    1 X, 2 O), X score and O score (2 bytes each, little endian), then the
+    X and O masks in ceil(size * size / 8) bytes each
+
+Meant for hosting many games at once, where a TicTacToe per game with its
+board lists would cost kilobytes.
+"""
+import struct
+
+from .nboard import _geometry, default_win_length
+
+_HEADER = struct.Struct('<BBBHH')
+
+NONE, X_WON, O_WON = 0, 1, 2
+
+_lines = {}
+
+
+def lines_through(size, win_length):
+    """For every square, the masks of the winning lines through it"""
+    key = (size, win_length)
+    lines = _lines.get(key)
+    if lines is None:
+        geometry = _geometry(size, win_length)
+        masks = [sum(1 << square for square in window) for window in geometry.windows]
+        lines = _lines[key] = tuple(tuple(masks[w] for w in geometry.through[square])
+                                    for square in range(size * size))
+    return lines
+
+
+class GameState:
+    """Board, side to move, winner and scores of one game"""
+    __slots__ = ('size', 'win_length', 'x', 'o', 'o_to_move', 'winner', 'x_score', 'o_score')
+
+    def __init__(self, size=3, win_length=None):
+        if win_length is None:
+            win_length = default_win_length(size)
+        if not 1 <= win_length <= size:
+            raise ValueError("win_length must be between 1 and the board size")
+        self.size = size
+        self.win_length = win_length
+        self.x = 0
+        self.o = 0
+        self.o_to_move = False
+        self.winner = NONE
+        self.x_score = 0
+        self.o_score = 0
+
+    @property
+    def turn(self):
+        return 'O' if self.o_to_move else 'X'
+
+    @property
+    def moves(self):
+        return bin(self.x | self.o).count('1')
+
+    def is_full(self):
+        return self.moves == self.size * self.size
+
+    def is_over(self):
+        return self.winner != NONE or self.is_full()
+
+    def play(self, square):
+        """Play the side to move on ``square``, False if the move is not legal"""
+        if not 0 <= square < self.size * self.size or self.is_over() or (self.x | self.o) >> square & 1:
+            return False
+        if self.o_to_move:
+            self.o |= 1 << square
+            stones = self.o
+        else:
+            self.x |= 1 << square
+            stones = self.x
+        for mask in lines_through(self.size, self.win_length)[square]:
+            if stones & mask == mask:
+                self.winner = O_WON if self.o_to_move else X_WON
+                if self.o_to_move:
+                    self.o_score += 1
+                else:
+                    self.x_score += 1
+                break
+        self.o_to_move = not self.o_to_move
+        return True
+
+    def cells(self):
+        """The board as a flat list of ' ', 'X' and 'O', like TicTacToe.board"""
+        x, o = self.x, self.o
+        return ['X' if x >> square & 1 else 'O' if o >> square & 1 else ' '
+                for square in range(self.size * self.size)]
+
+    def to_matrix(self):
+        """2D ' '/'X'/'O' layout the bots take, like TicTacToe.get_board_2d"""
+        cells = self.cells()
+        n = self.size
+        return [cells[i:i + n] for i in range(0, n * n, n)]
+
+    def pack(self):
+        mask_bytes = (self.size * self.size + 7) // 8
+        flags = self.o_to_move | self.winner << 1
+        return (_HEADER.pack(self.size, self.win_length, flags, self.x_score, self.o_score)
+                + self.x.to_bytes(mask_bytes, 'little') + self.o.to_bytes(mask_bytes, 'little'))
+
+    @classmethod
+    def unpack(cls, data):
+        size, win_length, flags, x_score, o_score = _HEADER.unpack_from(data)
+        state = cls(size, win_length)
+        mask_bytes = (size * size + 7) // 8
+        start = _HEADER.size
+        state.x = int.from_bytes(data[start:start + mask_bytes], 'little')
+        state.o = int.from_bytes(data[start + mask_bytes:start + 2 * mask_bytes], 'little')
+        state.o_to_move = bool(flags & 1)
+        state.winner = flags >> 1 & 3
+        state.x_score, state.o_score = x_score, o_score
+        return state
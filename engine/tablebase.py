@@ -0,0 +1,356 @@
+"""
+Retrograde-analysis endgame tablebases for N x N boards with k in a row.
+
+Every move fills one square, so a position with e empty squares only
+leads to positions with e - 1. Layers are therefore solved backwards from
+the full board: once layer e - 1 is on disk, each position of layer e is
+solved with one probe per legal move. Only positions still in play (no
+line on the board) are stored, and only the smallest of the 8 symmetric
+images of each.
+
+Each layer is two flat files that are memory-mapped when probed:
+
+    eNN.keys  sorted canonical keys ``x << n | o`` (n squares), the on-disk
+              index searched with bisect
+    eNN.vals  one signed byte per key for the side to move: +d wins in d
+              plies, -d loses in d plies, 0 is a draw
+
+index.json records the board and the finished layers. Generation splits
+each layer into fixed chunks solved by worker processes; finished chunks
+and layers stay on disk, so an interrupted run resumes where it stopped.
+
+    python -m engine.tablebase --size 4 --win-length 4 --max-empty 6
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import time
+from array import array
+from itertools import combinations
+
+from .nboard import DIRECTIONS, default_win_length
+from .transposition import board_symmetries
+
+# Chunks per layer, fixed so a resumed run splits the work the same way
+CHUNKS = 64
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases')
+
+
+def default_path(size, win_length=None):
+    return os.path.join(BASE_DIR, f'{size}x{size}k{win_length or default_win_length(size)}')
+
+
+def _line_masks(size, win_length):
+    masks = []
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in DIRECTIONS:
+                end_row = row + d_row * (win_length - 1)
+                end_col = col + d_col * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    masks.append(sum(1 << ((row + d_row * i) * size + col + d_col * i)
+                                     for i in range(win_length)))
+    return masks
+
+
+class _Geometry:
+    """Line masks and symmetry tables of one board, built once per process"""
+
+    def __init__(self, size, win_length):
+        n = size * size
+        self.size = size
+        self.squares = n
+        self.full = (1 << n) - 1
+        self.lines = _line_masks(size, win_length)
+        # Per symmetry, the image of each byte of a bitmask
+        self.byte_maps = []
+        for perm in board_symmetries(size):
+            self.byte_maps.append([
+                [sum(1 << perm[b * 8 + i] for i in range(8) if value >> i & 1 and b * 8 + i < n)
+                 for value in range(256)]
+                for b in range((n + 7) // 8)
+            ])
+        # Boards of up to 16 squares get whole-mask tables: one lookup per image
+        self.full_maps = None
+        self.winning = None
+        if n <= 16:
+            self.full_maps = [[self._transform(maps, v) for v in range(1 << n)]
+                              for maps in self.byte_maps]
+            self.winning = bytes(any(v & m == m for m in self.lines) for v in range(1 << n))
+
+    @staticmethod
+    def _transform(maps, bits):
+        image = 0
+        for b, table in enumerate(maps):
+            image |= table[bits >> (8 * b) & 255]
+        return image
+
+    def has_line(self, bits):
+        if self.winning is not None:
+            return self.winning[bits]
+        for mask in self.lines:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def canonical(self, x, o):
+        """Smallest key ``x << n | o`` over the 8 images of the position"""
+        n = self.squares
+        if self.full_maps is not None:
+            return min(t[x] << n | t[o] for t in self.full_maps)
+        return min(self._transform(maps, x) << n | self._transform(maps, o) for maps in self.byte_maps)
+
+
+_geometries = {}
+
+
+def _geometry(size, win_length):
+    geometry = _geometries.get((size, win_length))
+    if geometry is None:
+        geometry = _geometries[(size, win_length)] = _Geometry(size, win_length)
+    return geometry
+
+
+def _key_typecode(size):
+    return 'I' if 2 * size * size <= 32 else 'Q'
+
+
+def _map(path, typecode):
+    """Read-only typed view of a file, empty when the file is"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return array(typecode)
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(data).cast(typecode)
+
+
+class _Layer:
+    """One solved layer: sorted keys and their values"""
+
+    def __init__(self, path, empty, typecode):
+        self.keys = _map(os.path.join(path, f'e{empty:02d}.keys'), typecode)
+        self.values = _map(os.path.join(path, f'e{empty:02d}.vals'), 'b')
+
+    def get(self, key):
+        keys = self.keys
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self.values[i]
+        return None
+
+
+def _child_value(value):
+    """Value for the mover of a position whose reply is worth ``value`` to the opponent"""
+    if value > 0:
+        return -(value + 1)
+    if value < 0:
+        return 1 - value
+    return 0
+
+
+def _rank(value):
+    """Sort key: quicker wins first, then draws, then slower losses"""
+    if value > 0:
+        return (2, -value)
+    if value < 0:
+        return (0, -value)
+    return (1, 0)
+
+
+def _solve(geometry, previous, x, o):
+    """Value for the side to move of a position still in play"""
+    x_to_move = bin(x).count('1') == bin(o).count('1')
+    me, opp = (x, o) if x_to_move else (o, x)
+    free = geometry.full & ~(x | o)
+    best = None
+    while free:
+        low = free & -free
+        free ^= low
+        mine = me | low
+        if geometry.has_line(mine):
+            return 1
+        if mine | opp == geometry.full:
+            value = 0
+        else:
+            child = (mine, opp) if x_to_move else (opp, mine)
+            value = _child_value(previous.get(geometry.canonical(*child)))
+        if best is None or _rank(value) > _rank(best):
+            best = value
+    return 0 if best is None else best
+
+
+_open_layers = {}
+
+
+def _generate_chunk(task):
+    """Worker: solve every canonical position of one chunk of a layer and write it"""
+    path, size, win_length, empty, chunk = task
+    geometry = _geometry(size, win_length)
+    typecode = _key_typecode(size)
+    previous = None
+    if empty > 0:
+        previous = _open_layers.get((path, empty - 1))
+        if previous is None:
+            previous = _open_layers[(path, empty - 1)] = _Layer(path, empty - 1, typecode)
+
+    n = geometry.squares
+    stones = n - empty
+    x_count = (stones + 1) // 2
+    bits = [1 << square for square in range(n)]
+    solved = []
+    for index, occupied in enumerate(combinations(range(n), stones)):
+        if index % CHUNKS != chunk:
+            continue
+        occupied_mask = sum(bits[square] for square in occupied)
+        for x_squares in combinations(occupied, x_count):
+            x = sum(bits[square] for square in x_squares)
+            o = occupied_mask ^ x
+            if geometry.has_line(x) or geometry.has_line(o):
+                continue
+            key = x << n | o
+            if geometry.canonical(x, o) != key:
+                continue  # another image of this position is the one stored
+            solved.append((key, _solve(geometry, previous, x, o)))
+    solved.sort()
+
+    base = os.path.join(path, f'e{empty:02d}.part{chunk:03d}')
+    _write(base, solved, typecode)
+    return len(solved)
+
+
+def _write(base, pairs, typecode):
+    """Write sorted (key, value) pairs as base.keys / base.vals, atomically"""
+    for suffix, data in (('.keys', array(typecode, [key for key, _ in pairs])),
+                         ('.vals', array('b', [value for _, value in pairs]))):
+        with open(base + suffix + '.tmp', 'wb') as f:
+            data.tofile(f)
+        os.replace(base + suffix + '.tmp', base + suffix)
+
+
+def _read(path, typecode):
+    data = array(typecode)
+    with open(path, 'rb') as f:
+        data.frombytes(f.read())
+    return data
+
+
+def _read_index(path):
+    try:
+        with open(os.path.join(path, 'index.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_index(path, index):
+    tmp = os.path.join(path, 'index.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, os.path.join(path, 'index.json'))
+
+
+def generate(size=4, win_length=None, max_empty=6, workers=None, path=None, verbose=False):
+    """Solve layers 0..max_empty into ``path``, skipping whatever is already on disk"""
+    from concurrent.futures import ProcessPoolExecutor  # only generation needs worker processes
+
+    win_length = win_length or default_win_length(size)
+    path = path or default_path(size, win_length)
+    os.makedirs(path, exist_ok=True)
+    typecode = _key_typecode(size)
+    index = _read_index(path) or {'size': size, 'win_length': win_length,
+                                  'key_typecode': typecode, 'layers': {}}
+    if (index['size'], index['win_length']) != (size, win_length):
+        raise ValueError(f"{path} holds a {index['size']}x{index['size']} k={index['win_length']} tablebase")
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    run = pool.map if pool is not None else map
+    start = time.perf_counter()
+    try:
+        for empty in range(min(max_empty, size * size) + 1):
+            if str(empty) in index['layers']:
+                continue
+            tasks = [(path, size, win_length, empty, chunk) for chunk in range(CHUNKS)
+                     if not os.path.exists(os.path.join(path, f'e{empty:02d}.part{chunk:03d}.vals'))]
+            for _ in run(_generate_chunk, tasks):
+                pass
+
+            # Merge the chunks into the layer, then drop them
+            pairs = []
+            for chunk in range(CHUNKS):
+                base = os.path.join(path, f'e{empty:02d}.part{chunk:03d}')
+                pairs.extend(zip(_read(base + '.keys', typecode), _read(base + '.vals', 'b')))
+            pairs.sort()
+            _write(os.path.join(path, f'e{empty:02d}'), pairs, typecode)
+            index['layers'][str(empty)] = {'positions': len(pairs)}
+            _write_index(path, index)
+            for chunk in range(CHUNKS):
+                base = os.path.join(path, f'e{empty:02d}.part{chunk:03d}')
+                os.remove(base + '.keys')
+                os.remove(base + '.vals')
+            if verbose:
+                print(f"layer {empty}: {len(pairs)} positions, {time.perf_counter() - start:.1f}s",
+                      flush=True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return index
+
+
+class Tablebase:
+    """Probes a generated tablebase, each layer is mapped on first use"""
+
+    def __init__(self, path):
+        index = _read_index(path)
+        if index is None:
+            raise FileNotFoundError(f"No tablebase index in {path}")
+        self.path = path
+        self.size = index['size']
+        self.win_length = index['win_length']
+        self.typecode = index['key_typecode']
+        self.geometry = _geometry(self.size, self.win_length)
+        # Layers are usable from the full board up to the first missing one
+        self.max_empty = -1
+        while str(self.max_empty + 1) in index['layers']:
+            self.max_empty += 1
+        self.layers = {}
+        self.probes = 0
+
+    def probe(self, x, o):
+        """Value for the side to move (+d win in d plies, -d loss, 0 draw), None if not stored"""
+        empty = self.geometry.squares - bin(x | o).count('1')
+        if empty > self.max_empty:
+            return None
+        layer = self.layers.get(empty)
+        if layer is None:
+            layer = self.layers[empty] = _Layer(self.path, empty, self.typecode)
+        self.probes += 1
+        return layer.get(self.geometry.canonical(x, o))
+
+
+_loaded = {}
+
+
+def find_tablebase(size, win_length=None):
+    """The generated tablebase for this board in the default location, None if there is none"""
+    key = (size, win_length or default_win_length(size))
+    if key not in _loaded:
+        path = default_path(*key)
+        _loaded[key] = Tablebase(path) if os.path.exists(os.path.join(path, 'index.json')) else None
+    return _loaded[key]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate an endgame tablebase")
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--win-length', type=int, default=None)
+    parser.add_argument('--max-empty', type=int, default=6, help="solve positions with up to this many empty squares")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default=None, help="directory (default: engine/tablebases/<board>)")
+    args = parser.parse_args()
+    result = generate(args.size, args.win_length, args.max_empty, args.workers, args.out, verbose=True)
+    print(f"{sum(layer['positions'] for layer in result['layers'].values())} positions in "
+          f"{args.out or default_path(args.size, args.win_length)}")
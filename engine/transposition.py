@@ -0,0 +1,230 @@
+"""
+Transposition table keyed by canonical position.
+
+A 3x3 board has 8 symmetries (4 rotations, each optionally mirrored). Every
+position is reduced to the smallest of its 8 images so that equivalent
+positions share one table entry.
+"""
+from collections import OrderedDict
+
+
+def _rotate(square):
+    row, col = divmod(square, 3)
+    return col * 3 + (2 - row)
+
+
+def _mirror(square):
+    row, col = divmod(square, 3)
+    return row * 3 + (2 - col)
+
+
+def _build_symmetries():
+    identity = tuple(range(9))
+    perms = []
+    perm = identity
+    for _ in range(4):
+        perms.append(perm)
+        perms.append(tuple(_mirror(perm[i]) for i in range(9)))
+        perm = tuple(_rotate(perm[i]) for i in range(9))
+    return tuple(perms)
+
+
+# SYMMETRIES[s][square] is where ``square`` ends up under symmetry s
+SYMMETRIES = _build_symmetries()
+
+# INVERSE[s] is the symmetry that undoes symmetry s
+INVERSE = tuple(
+    next(t for t in range(8) if all(SYMMETRIES[t][SYMMETRIES[s][i]] == i for i in range(9)))
+    for s in range(8)
+)
+
+
+def _transform_bits(perm, bits):
+    out = 0
+    for square in range(9):
+        if bits >> square & 1:
+            out |= 1 << perm[square]
+    return out
+
+
+# TRANSFORMS[s][bits] maps a whole 9-bit mask through symmetry s
+TRANSFORMS = tuple(
+    tuple(_transform_bits(perm, bits) for bits in range(1 << 9))
+    for perm in SYMMETRIES
+)
+
+
+def canonical(a, b):
+    """
+    Reduce the mask pair (a, b) to its canonical image.
+    Returns (key, symmetry) where key packs the transformed masks as
+    ``a << 9 | b`` and symmetry is the index that produced it.
+    """
+    best_key = None
+    best_sym = 0
+    for sym, table in enumerate(TRANSFORMS):
+        key = table[a] << 9 | table[b]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_sym = sym
+    return best_key, best_sym
+
+
+def canonical_key(a, b):
+    """Canonical key of the mask pair (a, b), without the symmetry index"""
+    return min(table[a] << 9 | table[b] for table in TRANSFORMS)
+
+
+def transform_square(sym, square):
+    return SYMMETRIES[sym][square]
+
+
+_board_symmetries = {}
+
+
+def board_symmetries(size):
+    """
+    The 8 rotations and reflections of a size x size board as square
+    permutations: perm[square] is where ``square`` ends up.
+    """
+    perms = _board_symmetries.get(size)
+    if perms is not None:
+        return perms
+    last = size - 1
+    maps = (
+        lambda r, c: (r, c), lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c), lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+        lambda r, c: (c, r), lambda r, c: (last - c, last - r),
+    )
+    perms = []
+    for fn in maps:
+        perm = [0] * (size * size)
+        for square in range(size * size):
+            row, col = fn(*divmod(square, size))
+            perm[square] = row * size + col
+        perms.append(perm)
+    perms = _board_symmetries[size] = tuple(tuple(perm) for perm in perms)
+    return perms
+
+
+class TranspositionTable:
+    """Bounded position -> value cache with least-recently-used eviction"""
+
+    def __init__(self, max_size=1 << 16):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            pass  # evicted by another thread sharing the table
+        return value
+
+    def put(self, key, value):
+        entries = self.entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    def resize(self, max_size):
+        """Change the size bound, evicting the oldest entries if needed"""
+        self.max_size = max_size
+        while len(self.entries) > max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+
+# Added to search scores so they fit an unsigned 64-bit word
+_SCORE_OFFSET = 1 << 62
+# Set in every stored meta word, so an all-zero slot reads as empty
+_VALID = 1 << 40
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size table of search entries (depth, score, flag, move) in a
+    multiprocessing.shared_memory block, so worker processes searching the
+    same position read each other's results. Pass the ``name`` of an
+    existing table to attach to it instead of creating one.
+
+    Each slot is three 64-bit words: key ^ score ^ meta, score and meta.
+    Nothing is locked; a slot torn by two processes writing at once fails
+    the XOR check and reads as a miss. Colliding keys simply replace each
+    other.
+    """
+
+    def __init__(self, slots=1 << 18, name=None):
+        # Only parallel search needs shared memory, so it is imported here
+        from multiprocessing import shared_memory
+
+        self.slots = slots
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=24 * slots)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.memory.name
+        self.words = self.memory.buf.cast('Q')
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        i = key % self.slots * 3
+        words = self.words
+        score, meta = words[i + 1], words[i + 2]
+        if not meta or words[i] ^ score ^ meta != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        move = (meta >> 16 & 0xFFFFFF) - 1
+        return (meta & 0xFF, score - _SCORE_OFFSET, meta >> 8 & 0xFF, None if move < 0 else move)
+
+    def put(self, key, value):
+        depth, score, flag, move = value
+        meta = _VALID | (0 if move is None else move + 1) << 16 | flag << 8 | depth
+        score += _SCORE_OFFSET
+        i = key % self.slots * 3
+        words = self.words
+        words[i + 1] = score
+        words[i + 2] = meta
+        words[i] = key ^ score ^ meta
+
+    def clear(self):
+        self.memory.buf[:] = bytes(len(self.memory.buf))
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        """Detach, and free the block if this table created it"""
+        if self.words is None:
+            return
+        self.words.release()
+        self.words = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+# One table for the whole process so every bot reuses earlier searches
+shared_table = TranspositionTable()
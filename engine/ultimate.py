@@ -0,0 +1,202 @@
+"""
+Ultimate tic-tac-toe: nine 3x3 boards laid out in a 3x3 grid.
+
+Winning a small board claims that square of the big board, and three
+claimed squares in a row win the game. The cell a move is played on sends
+the opponent to the small board in the same position; if that board is
+already won or full they may play in any open board.
+
+Each small board is a pair of 9-bit masks, so a win check is one lookup
+in engine.bitboard's WINNING table and the legal moves of a board are the
+bits of one mask. Squares are numbered row-major across the 9x9 grid,
+like an N x N board, and UltimateBoard offers the same interface as
+engine.nboard.Board (play, undo, candidate_moves, evaluate, hash, ...), so
+engine.search.IterativeDeepeningSearch searches it unchanged.
+"""
+import random
+
+from .bitboard import FULL_MASK, WIN_MASKS, WINNING
+from .nboard import EMPTY, O, X
+
+# win_length that stands for this variant in board menus and game records
+ULTIMATE = 0
+
+SIZE = 9
+
+# Small board and cell of every grid square, and the grid square of each (board, cell)
+BOARD_OF = tuple((row // 3) * 3 + col // 3 for row in range(SIZE) for col in range(SIZE))
+CELL_OF = tuple((row % 3) * 3 + col % 3 for row in range(SIZE) for col in range(SIZE))
+SQUARE_AT = tuple(tuple((board // 3 * 3 + cell // 3) * SIZE + board % 3 * 3 + cell % 3 for cell in range(9))
+                  for board in range(9))
+
+# Cells tried first: center, corners, edges
+CELL_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Value of an open line holding 0, 1 or 2 of one side's marks
+LINE_WEIGHTS = (0, 1, 10)
+# A claimed small board outweighs any shape inside the small boards
+MACRO_WEIGHT = 200
+# Small boards on more big-board lines matter more: center, corners, edges
+BOARD_WEIGHTS = tuple(sum(1 for mask in WIN_MASKS if mask >> board & 1) for board in range(9))
+
+
+def _line_values():
+    """LINE_VALUE[me << 9 | blocked]: weights of the lines ``blocked`` leaves open for ``me``"""
+    values = {}
+    for me in range(1 << 9):
+        if WINNING[me]:
+            continue
+        weights = [(mask, LINE_WEIGHTS[bin(me & mask).count('1')]) for mask in WIN_MASKS]
+        # Every subset of the squares ``me`` leaves free
+        rest = FULL_MASK & ~me
+        blocked = rest
+        while True:
+            values[me << 9 | blocked] = sum(weight for mask, weight in weights if not blocked & mask)
+            if not blocked:
+                break
+            blocked = (blocked - 1) & rest
+    return values
+
+
+LINE_VALUE = _line_values()
+
+# Zobrist keys per square and side, and per board the next move is sent to (9 for any)
+_rng = random.Random(SIZE * 1000 + ULTIMATE)
+ZOBRIST = [(0, _rng.getrandbits(64), _rng.getrandbits(64)) for _ in range(SIZE * SIZE)]
+FORCED_KEYS = [_rng.getrandbits(64) for _ in range(10)]
+
+
+class UltimateBoard:
+    """The nine small boards as bitmasks, plus the big board and the board the next move is sent to"""
+    size = SIZE
+    win_length = ULTIMATE
+
+    def __init__(self):
+        self.x = [0] * 9
+        self.o = [0] * 9
+        self.won_x = 0  # big-board masks of the small boards each side won
+        self.won_o = 0
+        self.closed = 0  # small boards won or full
+        self.forced = None  # small board the side to move must play in, None for any open one
+        self.cells = [EMPTY] * (SIZE * SIZE)
+        self.moves = []
+        self.sent = []  # forced before each move, for undo
+        self.winner = None
+        self.winner_ply = 0
+        self.hash = FORCED_KEYS[9]
+
+    def copy(self):
+        board = UltimateBoard.__new__(UltimateBoard)
+        board.x, board.o = self.x[:], self.o[:]
+        board.won_x, board.won_o, board.closed = self.won_x, self.won_o, self.closed
+        board.forced = self.forced
+        board.cells, board.moves, board.sent = self.cells[:], self.moves[:], self.sent[:]
+        board.winner, board.winner_ply, board.hash = self.winner, self.winner_ply, self.hash
+        return board
+
+    def to_move(self):
+        return X if len(self.moves) % 2 == 0 else O
+
+    def legal_moves(self):
+        """Every square the side to move may play, small board by small board"""
+        if self.winner is not None:
+            return []
+        if self.forced is not None:
+            boards = (self.forced,)
+        else:
+            boards = [b for b in range(9) if not self.closed >> b & 1]
+        x, o = self.x, self.o
+        moves = []
+        for b in boards:
+            free = FULL_MASK & ~(x[b] | o[b])
+            squares = SQUARE_AT[b]
+            moves.extend(squares[cell] for cell in CELL_ORDER if free >> cell & 1)
+        return moves
+
+    candidate_moves = legal_moves
+
+    def is_legal(self, square):
+        board = BOARD_OF[square]
+        return (self.winner is None and self.cells[square] == EMPTY and not self.closed >> board & 1
+                and (self.forced is None or self.forced == board))
+
+    def play(self, square):
+        """Play the side to move on ``square``, which must be legal"""
+        side = self.to_move()
+        b, cell = BOARD_OF[square], CELL_OF[square]
+        bit = 1 << b
+        if side == X:
+            stones = self.x[b] = self.x[b] | 1 << cell
+        else:
+            stones = self.o[b] = self.o[b] | 1 << cell
+        if WINNING[stones]:
+            self.closed |= bit
+            if side == X:
+                self.won_x |= bit
+                won = WINNING[self.won_x]
+            else:
+                self.won_o |= bit
+                won = WINNING[self.won_o]
+            if won and self.winner is None:
+                self.winner = side
+                self.winner_ply = len(self.moves) + 1
+        elif self.x[b] | self.o[b] == FULL_MASK:
+            self.closed |= bit
+        self.cells[square] = side
+        self.moves.append(square)
+        self.sent.append(self.forced)
+        previous = self.forced
+        self.forced = None if self.closed >> cell & 1 else cell
+        self.hash ^= (ZOBRIST[square][side] ^ FORCED_KEYS[9 if previous is None else previous]
+                      ^ FORCED_KEYS[9 if self.forced is None else self.forced])
+
+    def undo(self):
+        """Take back the last move"""
+        square = self.moves.pop()
+        side = self.cells[square]
+        b, cell = BOARD_OF[square], CELL_OF[square]
+        mask = ~(1 << b)
+        if side == X:
+            self.x[b] &= ~(1 << cell)
+        else:
+            self.o[b] &= ~(1 << cell)
+        # The board was open before this move, so whatever closed it was this move
+        self.closed &= mask
+        self.won_x &= mask
+        self.won_o &= mask
+        self.cells[square] = EMPTY
+        after = self.forced
+        self.forced = self.sent.pop()
+        self.hash ^= (ZOBRIST[square][side] ^ FORCED_KEYS[9 if after is None else after]
+                      ^ FORCED_KEYS[9 if self.forced is None else self.forced])
+        if self.winner is not None and len(self.moves) < self.winner_ply:
+            self.winner = None
+        return square
+
+    def place(self, square, is_x):
+        """Same signature as Bitboard.place, the side must be the one to move"""
+        if is_x != (self.to_move() == X):
+            raise ValueError("It is the other side's turn")
+        self.play(square)
+
+    def wins_through(self, square, is_x):
+        """True when the given side has won the game, as the move on ``square`` can only decide it"""
+        return self.winner == (X if is_x else O)
+
+    def is_full(self):
+        """No move is left: every small board is won or full"""
+        return self.closed == FULL_MASK
+
+    def is_over(self):
+        return self.winner is not None or self.closed == FULL_MASK
+
+    def evaluate(self):
+        """Heuristic score from the point of view of the side to move"""
+        drawn = self.closed & ~(self.won_x | self.won_o)
+        score = MACRO_WEIGHT * (LINE_VALUE[self.won_x << 9 | self.won_o | drawn]
+                                - LINE_VALUE[self.won_o << 9 | self.won_x | drawn])
+        x, o, closed = self.x, self.o, self.closed
+        for b in range(9):
+            if not closed >> b & 1:
+                score += BOARD_WEIGHTS[b] * (LINE_VALUE[x[b] << 9 | o[b]] - LINE_VALUE[o[b] << 9 | x[b]])
+        return score if len(self.moves) % 2 == 0 else -score
@@ -1,95 +1,152 @@
-from bots.minimax_bot import MinimaxBot
+import argparse
+import time
+
+from engine.bitboard import Bitboard
+from engine.nboard import Board, default_win_length
+from engine.records import GameWriter, describe_player
+from engine.ultimate import ULTIMATE, UltimateBoard
 
 class TicTacToe:
-    def __init__(self):
-        self.board = [' ' for _ in range(9)]  # A list to represent the board
+    def __init__(self, size=3, win_length=None):
+        self.size = size
+        self.win_length = win_length or default_win_length(size)
+        self.board = [' ' for _ in range(size * size)]  # A list to represent the board
         self.current_winner = None  # Keep track of the winner!
+        self.winner_ply = 0  # moves on the board when the game was won
+        # Mirror of self.board used for win checks, bitboard for the classic game
+        if size == 3 and self.win_length == 3:
+            self.state = Bitboard()
+        else:
+            self.state = Board(size, self.win_length)
+        # (square, letter) of every move played, and the moves taken back since
+        self.moves = []
+        self.undone = []
 
     def print_board(self):
-        for i in range(3):
-            print('|'.join(self.board[i*3:(i+1)*3]))
-            if i < 2:
-                print('-' * 5)
+        n = self.size
+        for i in range(n):
+            print('|'.join(self.board[i*n:(i+1)*n]))
+            if i < n - 1:
+                print('-' * (2 * n - 1))
 
     def available_moves(self):
         return [i for i, spot in enumerate(self.board) if spot == ' ']
 
     def empty_squares(self):
-        return ' ' in self.board
+        return len(self.moves) < len(self.board)
 
     def make_move(self, square, letter):
+        if self._place(square, letter):
+            self.undone.clear()
+            return True
+        return False
+
+    def _place(self, square, letter):
         if self.board[square] == ' ':
             self.board[square] = letter
-            if self.winner(square, letter):
+            self.state.place(square, letter == 'X')
+            self.moves.append((square, letter))
+            if self.current_winner is None and self.winner(square, letter):
                 self.current_winner = letter
+                self.winner_ply = len(self.moves)
             return True
         return False
 
-    def winner(self, square, letter):
-        # Check the row
-        row_ind = square // 3
-        row = self.board[row_ind*3:(row_ind+1)*3]
-        if all([spot == letter for spot in row]):
-            return True
+    def undo_move(self):
+        """Take back the last move and return its (square, letter), None if there is none"""
+        if not self.moves:
+            return None
+        square, letter = move = self.moves.pop()
+        self.board[square] = ' '
+        if isinstance(self.state, Bitboard):
+            self.state.clear(square)
+        else:
+            self.state.undo()
+        if self.current_winner is not None and len(self.moves) < self.winner_ply:
+            self.current_winner = None
+        self.undone.append(move)
+        return move
 
-        # Check column
-        col_ind = square % 3
-        column = [self.board[col_ind+i*3] for i in range(3)]
-        if all([spot == letter for spot in column]):
-            return True
+    def redo_move(self):
+        """Play again the last move taken back, returns it or None"""
+        if not self.undone:
+            return None
+        move = self.undone.pop()
+        self._place(*move)
+        return move
 
-        # Check diagonals
-        if square % 2 == 0:
-            diagonal1 = [self.board[i] for i in [0, 4, 8]]
-            if all([spot == letter for spot in diagonal1]):
-                return True
-            diagonal2 = [self.board[i] for i in [2, 4, 6]]
-            if all([spot == letter for spot in diagonal2]):
-                return True
-        return False
+    def replay(self, squares):
+        """Play a sequence of squares, alternating X and O from the side to move"""
+        for square in squares:
+            if not self.make_move(square, self.to_move()):
+                raise ValueError(f"Square {square} is not a legal move")
+
+    def to_move(self):
+        """X moves first, so X is to move after an even number of moves"""
+        return 'X' if len(self.moves) % 2 == 0 else 'O'
+
+    def winner(self, square, letter):
+        # Only the row, column and diagonals through the square can be completed
+        return self.state.wins_through(square, letter == 'X')
 
     def get_board_2d(self):
         """Convert 1D board to 2D for bot interface"""
-        return [self.board[i:i+3] for i in range(0, 9, 3)]
+        n = self.size
+        return [self.board[i:i+n] for i in range(0, n * n, n)]
 
-    def play_game(self, player1, player2):
+    def bot_view(self):
+        """What a bot's get_move is given: the 2D board"""
+        return self.get_board_2d()
+
+    def play_game(self, player1, player2, recorder=None):
         """
         Player1 and Player2 can be:
         - 'human'
         - Bot instance (MinimaxBot or RLBot)
+        Every move is streamed to ``recorder`` (an engine.records.GameWriter) if given.
         """
         print("\nGame starting...")
         self.print_board()
+        if recorder is not None:
+            recorder.begin_game(self.size, self.win_length,
+                                (describe_player(player1), describe_player(player2)))
 
         current_player = 'X'
         while self.empty_squares():
+            move_start = time.perf_counter()
             # Get the current player's move
             if current_player == 'X':
                 if player1 == 'human':
                     square = self._get_human_move()
                 else:  # Bot move
-                    row, col = player1.get_move(self.get_board_2d())
-                    square = row * 3 + col
+                    row, col = player1.get_move(self.bot_view())
+                    square = row * self.size + col
             else:
                 if player2 == 'human':
                     square = self._get_human_move()
                 else:  # Bot move
-                    row, col = player2.get_move(self.get_board_2d())
-                    square = row * 3 + col
+                    row, col = player2.get_move(self.bot_view())
+                    square = row * self.size + col
 
             # Make the move
             if self.make_move(square, current_player):
+                if recorder is not None:
+                    recorder.record_move(square, time.perf_counter() - move_start)
                 print(f"\nPlayer {current_player} makes a move to square {square}")
                 self.print_board()
 
                 if self.current_winner:
                     print(f"\nPlayer {current_player} wins!")
+                    if recorder is not None:
+                        recorder.end_game(current_player)
                     return current_player
 
                 # Switch players
                 current_player = 'O' if current_player == 'X' else 'X'
 
         print("\nIt's a tie!")
+        if recorder is not None:
+            recorder.end_game(None)
         return None
 
     def _get_human_move(self):
@@ -98,7 +155,7 @@ class TicTacToe:
         square = None
         while not valid_square:
             try:
-                square = int(input('Enter your move (0-8): '))
+                square = int(input(f'Enter your move (0-{self.size * self.size - 1}): '))
                 if square not in self.available_moves():
                     raise ValueError
                 valid_square = True
@@ -106,14 +163,88 @@ class TicTacToe:
                 print('Invalid square. Try again.')
         return square
 
-def create_bot(bot_type, difficulty):
-    """Factory function to create bots"""
+class UltimateTicTacToe(TicTacToe):
+    """
+    Ultimate tic-tac-toe on the 9x9 grid of nine 3x3 boards, see
+    engine.ultimate. Squares are numbered 0-80 row by row across the grid,
+    and a move is only legal in the small board the previous move sent the
+    player to. Recorded with win_length ULTIMATE.
+    """
+    def __init__(self):
+        self.size = 9
+        self.win_length = ULTIMATE
+        self.board = [' ' for _ in range(81)]
+        self.current_winner = None
+        self.winner_ply = 0
+        self.state = UltimateBoard()
+        self.moves = []
+        self.undone = []
+
+    def print_board(self):
+        forced = self.state.forced
+        for row in range(9):
+            blocks = ['|'.join(self.board[row * 9 + col:row * 9 + col + 3]) for col in (0, 3, 6)]
+            print(' || '.join(blocks))
+            if row in (2, 5):
+                print('=' * 23)
+        if not self.state.is_over():
+            board = 'any open board' if forced is None else f"board {forced + 1} (1-9 left to right, top to bottom)"
+            print(f"{self.to_move()} plays in {board}")
+
+    def available_moves(self):
+        return sorted(self.state.legal_moves())
+
+    def empty_squares(self):
+        return not self.state.is_over()
+
+    def _place(self, square, letter):
+        if letter != self.to_move() or not self.state.is_legal(square):
+            return False
+        return super()._place(square, letter)
+
+    def bot_view(self):
+        """The ultimate bot needs the last move as well, so it gets a copy of the engine board"""
+        return self.state.copy()
+
+def create_bot(bot_type, difficulty, win_length=None, size=None):
+    """Factory function to create bots, each bot module is imported on first use"""
     if bot_type.lower() == 'minimax':
-        return MinimaxBot(difficulty)
+        from bots.minimax_bot import MinimaxBot
+        return MinimaxBot(difficulty, win_length=win_length)
+    elif bot_type.lower() == 'mcts':
+        from bots.mcts_bot import MCTSBot
+        return MCTSBot(difficulty, win_length=win_length)
+    elif bot_type.lower() == 'rl':
+        if size not in (None, 3) or win_length not in (None, 3):
+            raise ValueError("The RL bot only plays the 3x3 game")
+        from bots.rl_bot import RLBot
+        return RLBot(difficulty)
+    elif bot_type.lower() == 'ultimate':
+        from bots.ultimate_bot import UltimateBot
+        return UltimateBot(difficulty)
     else:
-        raise ValueError("Invalid bot type. Only 'minimax' is supported")
+        raise ValueError("Invalid bot type. Use 'minimax', 'mcts', 'rl' or 'ultimate'")
+
+# Board choices offered in the menu: (size, win length), ULTIMATE for ultimate tic-tac-toe
+BOARD_CHOICES = {'1': (3, 3), '2': (4, 4), '3': (5, 4), '4': (15, 5), '5': (9, ULTIMATE)}
+
+# Bot choices offered in the menu, the RL bot only knows the 3x3 board
+BOT_CHOICES = {'1': 'minimax', '2': 'rl', '3': 'mcts'}
+
+def select_bot_type(size, win_length=None):
+    if win_length == ULTIMATE:
+        print("Ultimate tic-tac-toe is played by the Ultimate Search Bot")
+        return 'ultimate'
+    print("1. Minimax Bot")
+    if size == 3:
+        print("2. Reinforcement Learning Bot")
+    print("3. Monte Carlo Tree Search Bot")
+    bot_type = BOT_CHOICES.get(input("Enter choice (1-3): "), 'minimax')
+    if bot_type == 'rl' and size != 3:
+        bot_type = 'minimax'
+    return bot_type
 
-def main():
+def main(recorder=None):
     while True:
         print("\nWelcome to Tic Tac Toe!")
         print("1. Player vs Bot")
@@ -126,13 +257,19 @@ def main():
         if choice == '4':
             break
             
-        game = TicTacToe()
+        print("\nSelect board:")
+        print("1. 3x3")
+        print("2. 4x4")
+        print("3. 5x5 (4 in a row)")
+        print("4. 15x15 (5 in a row)")
+        print("5. Ultimate (nine 3x3 boards)")
+        size, win_length = BOARD_CHOICES.get(input("Enter board (1-5): "), (3, 3))
+
+        game = UltimateTicTacToe() if win_length == ULTIMATE else TicTacToe(size, win_length)
         
         if choice == '1':
-            # print("\nSelect bot type:")
-            # print("1. Minimax Bot")
-            # print("2. Reinforcement Learning Bot")
-            # bot_choice = input("Enter choice (1-2): ")
+            print("\nSelect bot type:")
+            bot_type = select_bot_type(size, win_length)
             
             print("\nSelect difficulty:")
             print("1. Easy")
@@ -142,22 +279,19 @@ def main():
             
             # Convert difficulty choice to string
             difficulty_map = {'1': 'easy', '2': 'medium', '3': 'hard'}
-            bot_type = 'minimax' 
             
-            bot = create_bot(bot_type, difficulty_map[difficulty])
-            game.play_game('human', bot)
+            bot = create_bot(bot_type, difficulty_map[difficulty], win_length, size)
+            game.play_game('human', bot, recorder)
             
         elif choice == '2':
-            game.play_game('human', 'human')
+            game.play_game('human', 'human', recorder)
             
         elif choice == '3':
             print("\nSelect bot types and difficulties:")
             
             # Bot 1 setup
             print("\nBot 1:")
-            # print("1. Minimax Bot")
-            # print("2. Reinforcement Learning Bot")
-            # bot1_choice = input("Enter choice (1-2): ")
+            bot1_type = select_bot_type(size, win_length)
             print("\nSelect difficulty:")
             print("1. Easy")
             print("2. Medium")
@@ -166,9 +300,7 @@ def main():
             
             # Bot 2 setup
             print("\nBot 2:")
-            # print("1. Minimax Bot")
-            # print("2. Reinforcement Learning Bot")
-            # bot2_choice = input("Enter choice (1-2): ")
+            bot2_type = select_bot_type(size, win_length)
             print("\nSelect difficulty:")
             print("1. Easy")
             print("2. Medium")
@@ -176,13 +308,17 @@ def main():
             bot2_diff = input("Enter difficulty (1-3): ")
             
             difficulty_map = {'1': 'easy', '2': 'medium', '3': 'hard'}
-            bot1_type = 'minimax'
-            bot2_type = 'minimax' 
-            
-            bot1 = create_bot(bot1_type, difficulty_map[bot1_diff])
-            bot2 = create_bot(bot2_type, difficulty_map[bot2_diff])
+            bot1 = create_bot(bot1_type, difficulty_map[bot1_diff], win_length, size)
+            bot2 = create_bot(bot2_type, difficulty_map[bot2_diff], win_length, size)
             
-            game.play_game(bot1, bot2)
+            game.play_game(bot1, bot2, recorder)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tic Tac Toe in the terminal")
+    parser.add_argument('--record', metavar='PATH', help="append every game played to this record file")
+    args = parser.parse_args()
+    if args.record:
+        with GameWriter(args.record) as writer:
+            main(writer)
+    else:
+        main()
\ No newline at end of file
@@ -1,48 +1,189 @@
+import os
 import tkinter as tk
 from tkinter import font
-from PIL import Image, ImageTk
-import random
-from bots.minimax_bot import MinimaxBot
+import threading
+import time
+from engine.records import describe_player
+from engine.bitboard import Bitboard
+from engine.nboard import Board, default_win_length
+from engine.ultimate import ULTIMATE, UltimateBoard
+# PIL, the bots and the worker pool are imported when first needed, so the window opens fast
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+LOGO_SOURCES = (os.path.join(_HERE, "assets", "logo.jpg"), os.path.join(_HERE, "logo.jpg"))
+LOGO_SIZE = (250, 90)
+
+
+def load_logo():
+    """
+    The logo resized to LOGO_SIZE as a Tk image, None if there is no logo.
+    The resized copy is cached as a PNG beside the source, which Tk reads by
+    itself, so PIL is only loaded the first time or after the logo changes.
+    """
+    source = next((path for path in LOGO_SOURCES if os.path.exists(path)), None)
+    if source is None:
+        return None
+    cache = os.path.splitext(source)[0] + "_%dx%d.png" % LOGO_SIZE
+    if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(source):
+        from PIL import Image, ImageTk
+        with Image.open(source) as image:
+            resized = image.resize(LOGO_SIZE, Image.LANCZOS)
+        try:
+            resized.save(cache)
+        except OSError:
+            return ImageTk.PhotoImage(resized)  # read-only install, resize every time
+    return tk.PhotoImage(file=cache)
+
+
+# (label, create_bot type) for the bot type radio buttons
+BOT_TYPES = [("Minimax", "minimax"), ("Reinforcement Learning", "rl"), ("Monte Carlo Tree Search", "mcts")]
+
+# (label, size, win length) for the board menus
+BOARD_SIZES = [("3x3", 3, 3), ("4x4", 4, 4), ("5x5, 4 in a row", 5, 4), ("15x15, 5 in a row", 15, 5),
+               ("Ultimate, nine 3x3 boards", 9, ULTIMATE)]
+
+
+def board_size(label):
+    """(size, win length) of a BOARD_SIZES label"""
+    return next((size, win_length) for text, size, win_length in BOARD_SIZES if text == label)
 
 
 class matrix:
-    def __init__(self):
-        self.matrix = [[None for _ in range(3)] for _ in range(3)]
+    def __init__(self, size=3, win_length=None):
+        self.size = size
+        self.win_length = win_length if win_length == ULTIMATE else win_length or default_win_length(size)
+        self.matrix = [[None for _ in range(size)] for _ in range(size)]
+        # Mirror of self.matrix for win checks, bitboard for the classic game
+        if self.win_length == ULTIMATE:
+            self.state = UltimateBoard()
+        elif size == 3 and self.win_length == 3:
+            self.state = Bitboard()
+        else:
+            self.state = Board(size, self.win_length)
+        self.moves = []  # (row, col) of every move, for takebacks
+        self.winner = None  # 1 if X won, 0 if O won
+        self.winner_ply = 0
+
+    def place(self, row, col, value):
+        """Put 1 (X) or 0 (O) on a square, keeping the mirror in sync"""
+        self.matrix[row][col] = value
+        square = row * self.size + col
+        self.state.place(square, value == 1)
+        self.moves.append((row, col))
+        # Only lines through the new stone can have been completed
+        if self.winner is None and self.state.wins_through(square, value == 1):
+            self.winner = value
+            self.winner_ply = len(self.moves)
+
+    def undo(self):
+        """Take back the last move and return its (row, col)"""
+        row, col = self.moves.pop()
+        self.matrix[row][col] = None
+        if isinstance(self.state, Bitboard):
+            self.state.clear(row * self.size + col)
+        else:
+            self.state.undo()
+        if len(self.moves) < self.winner_ply:
+            self.winner = None
+        return row, col
+
+    def is_legal(self, row, col):
+        """Empty square, and in ultimate inside the small board the last move sent the player to"""
+        if isinstance(self.state, UltimateBoard):
+            return self.state.is_legal(row * self.size + col)
+        return self.matrix[row][col] is None
+
+    def bot_view(self):
+        """A copy of what the bots choose from: the matrix, or the engine board in ultimate"""
+        if isinstance(self.state, UltimateBoard):
+            return self.state.copy()
+        return [row[:] for row in self.matrix]
     
     def check_win(self):
-        # Check rows
-        for row in self.matrix:
-            if all(cell == 1 for cell in row):
-                return 1  # X wins
-            if all(cell == 0 for cell in row):
-                return 0  # O wins
-
-        # Check columns
-        for col in range(3):
-            column = [self.matrix[row][col] for row in range(3)]
-            if all(cell == 1 for cell in column):
-                return 1
-            if all(cell == 0 for cell in column):
-                return 0
-
-        # Check diagonals
-        diag1 = [self.matrix[i][i] for i in range(3)]
-        diag2 = [self.matrix[i][2-i] for i in range(3)]
-        
-        if all(cell == 1 for cell in diag1) or all(cell == 1 for cell in diag2):
-            return 1
-        if all(cell == 0 for cell in diag1) or all(cell == 0 for cell in diag2):
-            return 0
-
-        return None
+        return self.winner  # 1 if X wins, 0 if O wins, None otherwise
 
     def check_draw(self):
-        return all(all(cell is not None for cell in row) for row in self.matrix)
+        if isinstance(self.state, UltimateBoard):
+            return self.state.is_full()  # every small board won or full
+        return len(self.moves) == self.size * self.size
+
+
+class BoardCanvas(tk.Canvas):
+    """
+    N x N board drawn on a single canvas. The grid is drawn once per game
+    and a move only replaces the mark of the cell that changed, so large
+    boards cost no more per move than 3x3.
+    """
+    PIXELS = 300
+    COLORS = {1: "#1F4E9A", 0: "#C0392B"}  # X, O
+    HIGHLIGHT = "#F2B134"
+
+    def __init__(self, master, on_click, size=3):
+        super().__init__(master, width=self.PIXELS, height=self.PIXELS, bg="white",
+                         highlightthickness=0)
+        self.on_click = on_click
+        self.bind("<Button-1>", self._clicked)
+        self.reset(size)
+
+    def reset(self, size, block=None):
+        """Clear the canvas and draw an empty board of ``size`` x ``size``, every ``block``-th line thick"""
+        self.delete("all")
+        self.size = size
+        self.cell = self.PIXELS / size
+        self.shown = [None] * (size * size)  # value drawn in each square
+        self.marks = {}  # square -> canvas item of its mark
+        self.outline = None  # canvas item around the highlighted cells
+        self.font = ("Arial", -int(self.cell * 0.6), "bold")  # negative size is in pixels
+        self.enabled = True
+        for i in range(1, size):
+            offset = i * self.cell
+            thick = block is not None and i % block == 0
+            width, color = (3, "#3D4852") if thick else (1, "#9AA5B1")
+            self.create_line(offset, 0, offset, self.PIXELS, fill=color, width=width)
+            self.create_line(0, offset, self.PIXELS, offset, fill=color, width=width)
+
+    def highlight(self, box):
+        """Outline the (row, col, cells) square block starting at row, col, or nothing for None"""
+        if box is None:
+            if self.outline is not None:
+                self.delete(self.outline)
+                self.outline = None
+            return
+        row, col, cells = box
+        coords = (col * self.cell + 2, row * self.cell + 2,
+                  (col + cells) * self.cell - 2, (row + cells) * self.cell - 2)
+        if self.outline is None:
+            self.outline = self.create_rectangle(*coords, outline=self.HIGHLIGHT, width=3)
+        else:
+            self.coords(self.outline, *coords)
+
+    def set_cell(self, row, col, value):
+        """Show 1 (X), 0 (O) or None on a square, redrawing it only if it changed"""
+        square = row * self.size + col
+        if self.shown[square] == value:
+            return
+        self.shown[square] = value
+        mark = self.marks.pop(square, None)
+        if mark is not None:
+            self.delete(mark)
+        if value is not None:
+            self.marks[square] = self.create_text(
+                (col + 0.5) * self.cell, (row + 0.5) * self.cell, text="X" if value == 1 else "O",
+                font=self.font, fill=self.COLORS[value])
+
+    def _clicked(self, event):
+        if not self.enabled:
+            return
+        row, col = int(event.y // self.cell), int(event.x // self.cell)
+        if 0 <= row < self.size and 0 <= col < self.size:
+            self.on_click(row, col)
 
 
 class TicTacToeApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, recorder=None):
         super().__init__()
+        # Optional engine.records.GameWriter that every game played is streamed to
+        self.recorder = recorder
         self.title("Tic Tac Toe Game")
         self.geometry("400x600")
         self.resizable(False, False)
@@ -50,24 +191,39 @@ class TicTacToeApp(tk.Tk):
         self.pages = {}
         self.current_page = None
 
-        # Initialize pages
-        self.add_page(HomePage(self))
-        self.add_page(SettingsPage(self))
-        self.add_page(GamePage(self))
-        self.add_page(BotSettingsPage(self))
+        # Pages are built the first time they are shown
+        self.page_classes = {page.page_name: page
+                             for page in (HomePage, SettingsPage, GamePage, BotSettingsPage)}
 
         # Show the home page initially
         self.show_page("HomePage")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self):
+        """Stop any bot search before closing, so exiting does not wait for it"""
+        game_page = self.pages.get("GamePage")
+        if game_page is not None:
+            game_page.cancel_bot_move()
+            game_page.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
 
     def add_page(self, page):
         """Add a page to the app."""
         self.pages[page.page_name] = page
 
+    def get_page(self, page_name):
+        """Return the page, building it on first use."""
+        page = self.pages.get(page_name)
+        if page is None:
+            page = self.page_classes[page_name](self)
+            self.add_page(page)
+        return page
+
     def show_page(self, page_name):
         """Show the requested page."""
         if self.current_page:
             self.current_page.pack_forget()
-        self.current_page = self.pages[page_name]
+        self.current_page = self.get_page(page_name)
         self.current_page.pack(fill="both", expand=True)
 
 
@@ -84,12 +240,13 @@ class HomePage(tk.Frame):
 
         # Logo (Optional)
         try:
-            image = Image.open(r"assets/logo.jpg")
-            image = image.resize((250, 90), Image.LANCZOS)
-            self.photo = ImageTk.PhotoImage(image)
+            self.photo = load_logo()
+        except Exception as e:
+            self.photo = None
+        if self.photo is not None:
             image_label = tk.Label(self, image=self.photo, bg="#D9E4F5")
             image_label.pack(pady=10)
-        except Exception as e:
+        else:
             tk.Label(self, text="Tic Tac Toe", font=title_font, bg="#D9E4F5").pack(pady=10)
 
         # Buttons for Game Modes
@@ -115,6 +272,13 @@ class SettingsPage(tk.Frame):
 
         tk.Label(self, text="Player vs Bot Settings", font=title_font, bg="#D9E4F5").pack(pady=20)
 
+        # Bot type selection
+        self.bot_type_var = tk.StringVar(value="minimax")
+        tk.Label(self, text="Select Bot Type:", font=option_font, bg="#D9E4F5").pack(pady=10)
+        for label, bot_type in BOT_TYPES:
+            tk.Radiobutton(self, text=label, variable=self.bot_type_var, value=bot_type, bg="#D9E4F5",
+                           font=option_font).pack(anchor="w", padx=20, pady=5)
+
         # Difficulty selection
         self.difficulty_var = tk.StringVar(value="Medium")
         tk.Label(self, text="Select Bot Difficulty:", font=option_font, bg="#D9E4F5").pack(pady=10)
@@ -123,6 +287,13 @@ class SettingsPage(tk.Frame):
             tk.Radiobutton(self, text=difficulty, variable=self.difficulty_var, value=difficulty, bg="#D9E4F5",
                            font=option_font).pack(anchor="w", padx=20, pady=5)
 
+        # Board selection
+        self.board_var = tk.StringVar(value=BOARD_SIZES[0][0])
+        board_frame = tk.Frame(self, bg="#D9E4F5")
+        board_frame.pack(pady=10)
+        tk.Label(board_frame, text="Board:", font=option_font, bg="#D9E4F5").pack(side="left")
+        tk.OptionMenu(board_frame, self.board_var, *[label for label, _, _ in BOARD_SIZES]).pack(side="left")
+
         # Start Game Button
         tk.Button(self, text="Start Game", font=option_font, bg="#6FA3EF", fg="black",
                   command=self.start_game).pack(pady=20, ipadx=20, ipady=5)
@@ -133,12 +304,13 @@ class SettingsPage(tk.Frame):
 
     def start_game(self):
         # for setting the diffculty
-        game_page = self.master.pages["GamePage"]
+        game_page = self.master.get_page("GamePage")
         difficulty = self.difficulty_var.get()  # Easy, Medium, or Hard
         game_page.initialize_game(
             mode="Player vs Bot",
-            bot_type="minimax",  # or we can add radio buttons to choose between 'minimax' and 'rl'
-            difficulty=difficulty
+            bot_type=self.bot_type_var.get(),
+            difficulty=difficulty,
+            board=board_size(self.board_var.get())
         )
         
         self.master.show_page("GamePage")
@@ -151,21 +323,20 @@ class BotSettingsPage(tk.Frame):
         title_font = font.Font(family="Arial Rounded MT Bold", size=16, weight="bold")
         option_font = font.Font(family="Arial", size=12)
 
-        tk.Label(self, text="Bot vs Bot Settings", font=title_font, bg="#D9E4F5").pack(pady=20)
+        tk.Label(self, text="Bot vs Bot Settings", font=title_font, bg="#D9E4F5").pack(pady=(20, 10))
 
-        # Bot 1 settings
-        tk.Label(self, text="Bot 1 (X)", font=title_font, bg="#D9E4F5").pack(pady=10)
-        self.bot1_difficulty = tk.StringVar(value="Medium")
-        for difficulty in ["Easy", "Medium", "Hard"]:
-            tk.Radiobutton(self, text=difficulty, variable=self.bot1_difficulty, value=difficulty, 
-                          bg="#D9E4F5", font=option_font).pack(anchor="w", padx=20, pady=5)
+        # Bot 1 and bot 2 settings, type and difficulty side by side to fit the window
+        self.bot1_type, self.bot1_difficulty = self._bot_choices("Bot 1 (X)", title_font, option_font)
+        self.bot2_type, self.bot2_difficulty = self._bot_choices("Bot 2 (O)", title_font, option_font)
 
-        # Bot 2 settings
-        tk.Label(self, text="Bot 2 (O)", font=title_font, bg="#D9E4F5").pack(pady=10)
-        self.bot2_difficulty = tk.StringVar(value="Medium")
-        for difficulty in ["Easy", "Medium", "Hard"]:
-            tk.Radiobutton(self, text=difficulty, variable=self.bot2_difficulty, value=difficulty,
-                          bg="#D9E4F5", font=option_font).pack(anchor="w", padx=20, pady=5)
+        # Board and playback speed
+        self.board_var = tk.StringVar(value=BOARD_SIZES[0][0])
+        self.fast_playback = tk.BooleanVar(value=False)
+        options_frame = tk.Frame(self, bg="#D9E4F5")
+        options_frame.pack(pady=10)
+        tk.OptionMenu(options_frame, self.board_var, *[label for label, _, _ in BOARD_SIZES]).pack(side="left")
+        tk.Checkbutton(options_frame, text="Fast playback", variable=self.fast_playback,
+                       bg="#D9E4F5", font=option_font).pack(side="left", padx=10)
 
         # Start Game Button
         tk.Button(self, text="Start Game", font=option_font, bg="#6FA3EF", fg="black",
@@ -175,20 +346,42 @@ class BotSettingsPage(tk.Frame):
         tk.Button(self, text="Back to Home", font=option_font, bg="#FF6F61", fg="black",
                  command=lambda: master.show_page("HomePage")).pack(pady=10, ipadx=20, ipady=5)
 
+    def _bot_choices(self, title, title_font, option_font):
+        """A bot's type radio buttons next to its difficulty ones, returns their (type, difficulty) variables"""
+        tk.Label(self, text=title, font=title_font, bg="#D9E4F5").pack(pady=(10, 0))
+        frame = tk.Frame(self, bg="#D9E4F5")
+        frame.pack()
+        bot_type = tk.StringVar(value="minimax")
+        for row, (label, kind) in enumerate(BOT_TYPES):
+            tk.Radiobutton(frame, text=label, variable=bot_type, value=kind,
+                          bg="#D9E4F5", font=option_font).grid(row=row, column=0, sticky="w", padx=(0, 10), pady=2)
+        difficulty = tk.StringVar(value="Medium")
+        for row, level in enumerate(["Easy", "Medium", "Hard"]):
+            tk.Radiobutton(frame, text=level, variable=difficulty, value=level,
+                          bg="#D9E4F5", font=option_font).grid(row=row, column=1, sticky="w", pady=2)
+        return bot_type, difficulty
+
     def start_game(self):
-        game_page = self.master.pages["GamePage"]
+        game_page = self.master.get_page("GamePage")
         game_page.initialize_game(
             mode="Bot vs Bot",
+            bot_type=(self.bot1_type.get(), self.bot2_type.get()),
             bot1_difficulty=self.bot1_difficulty.get(),
-            bot2_difficulty=self.bot2_difficulty.get()
+            bot2_difficulty=self.bot2_difficulty.get(),
+            board=board_size(self.board_var.get()),
+            fast_playback=self.fast_playback.get()
         )
         self.master.show_page("GamePage")
         
 class GamePage(tk.Frame):
     page_name = "GamePage"
+    POLL_MS = 50  # how often the Tk loop checks on the bot's search
+    MOVE_DELAY_MS = 1000  # pause between moves in Bot vs Bot
      
     def __init__(self, master):
         super().__init__(master, bg="#D9E4F5")
+        self.size = 3
+        self.win_length = 3
         self.mat = matrix()
         self.matrix = self.mat.matrix
         self.X_score = 0
@@ -198,36 +391,36 @@ class GamePage(tk.Frame):
         self.turn = "X"
         self.bot1 = None
         self.bot2 = None
+        # Fast playback drops the pause between Bot vs Bot moves and polls the search as often as Tk can
+        self.move_delay = self.MOVE_DELAY_MS
+        self.poll_ms = self.POLL_MS
+
+        # Bot moves are searched on a worker thread so the window stays responsive
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.bot_future = None
+        self.bot_started = None
+        # Set to stop the bot's search when its move is no longer wanted
+        self.bot_stop = None
+        # Set to stop the bot pondering on the player's time
+        self.ponder_stop = None
+        # When the side to move got the turn, for the game record
+        self.move_started = time.perf_counter()
 
         # Setup UI elements
         title_font = font.Font(family="Arial Rounded MT Bold", size=14, weight="bold")
-        button_font = font.Font(family="Arial", size=26, weight="bold")
 
         # Turn label
         self.turn_label = tk.Label(self, text="Player's Turn", font=title_font, bg="#D9E4F5")
         self.turn_label.pack(pady=10)
 
-        # Game grid buttons
-        self.buttons = []
-        grid_frame = tk.Frame(self, bg="#D9E4F5")
-        grid_frame.pack(pady=20)
-        
-        for row in range(3):
-            button_row = []
-            for col in range(3):
-                button = tk.Button(
-                    grid_frame, 
-                    text="", 
-                    font=button_font,
-                    width=3, 
-                    height=1,
-                    bg="white",
-                    fg="black",
-                    command=lambda r=row, c=col: self.set_value(r, c)
-                )
-                button.grid(row=row, column=col, padx=5, pady=5)
-                button_row.append(button)
-            self.buttons.append(button_row)
+        # Shows that the bot is thinking and how long it searched
+        self.status_label = tk.Label(self, text="", font=("Arial", 11), bg="#D9E4F5")
+        self.status_label.pack()
+
+        # Game board
+        self.board_view = BoardCanvas(self, self.set_value)
+        self.board_view.pack(pady=20)
 
         # Score labels
         self.X_score_label = tk.Label(self, text=f"X-Score: {self.X_score}", font=title_font, bg="#D9E4F5")
@@ -236,11 +429,14 @@ class GamePage(tk.Frame):
         self.O_score_label = tk.Label(self, text=f"O-Score: {self.O_score}", font=title_font, bg="#D9E4F5")
         self.O_score_label.pack(side="right", padx=20)
 
-        # Back button
+        # Undo and back buttons
+        tk.Button(self, text="Undo", font=title_font, bg="#6FA3EF", fg="black",
+                  command=self.undo_move).pack(pady=(20, 0))
         tk.Button(self, text="Back to Home", font=title_font, bg="#FF6F61", fg="black",
                   command=self.back_to_home).pack(pady=20)
 
     def set_winner(self, winner):
+        self._end_record(winner)
         self.turn_label.config(text=f"{winner} Wins!")
         if winner == "X":
             self.X_score += 1
@@ -248,45 +444,72 @@ class GamePage(tk.Frame):
         else:
             self.O_score += 1
             self.O_score_label.config(text=f"O-Score: {self.O_score}")
-        self._disable_buttons()
+        self.board_view.enabled = False
 
     def set_draw(self):
+        self._end_record(None)
         self.turn_label.config(text="It's a Draw!")
-        self._disable_buttons()
+        self.board_view.enabled = False
 
-    def _disable_buttons(self):
-        for row in self.buttons:
-            for button in row:
-                button.config(state="disabled")
+    def undo_move(self):
+        """Take back the last move, or against the bot the player's last move and the reply"""
+        if (self.mode == "Bot vs Bot" or not self.mat.moves or
+                self.mat.check_win() is not None or self.mat.check_draw()):
+            return
+        self.cancel_bot_move()
+        recorder = self.master.recorder
+        while self.mat.moves:
+            x_move = len(self.mat.moves) % 2 == 1
+            row, col = self.mat.undo()
+            self.board_view.set_cell(row, col, None)
+            self._show_forced()
+            if recorder is not None and recorder.current is not None:
+                recorder.takeback()
+            # Against the bot, keep going back until it is the player's (X) turn
+            if self.mode != "Player vs Bot" or x_move:
+                break
+        self.turn = "X" if len(self.mat.moves) % 2 == 0 else "O"
+        self.move_started = time.perf_counter()
+        self.update_turn_label()
+        if self.mode == "Player vs Bot":
+            self.start_pondering()
 
     def back_to_home(self):
         self.reset_game()
         self.master.show_page("HomePage")
 
-    def reset_game(self):
-        self.mat = matrix()
-        self.matrix = self.mat.matrix
-        self.turn = "X"
-        for row in self.buttons:
-            for button in row:
-                button.config(text="", state="normal")
-        self.update_turn_label()
-
     def update_turn_label(self):
         self.turn_label.config(text=f"{self.turn}'s Turn")
     
-    def initialize_game(self, mode, bot_type="minimax", difficulty=None, bot1_difficulty=None, bot2_difficulty=None):
-        """Initialize the game with proper mode and bot settings"""
+    def initialize_game(self, mode, bot_type="minimax", difficulty=None, bot1_difficulty=None, bot2_difficulty=None,
+                        board=(3, 3), fast_playback=False):
+        """Initialize the game with proper mode, board (size, win length) and bot settings"""
+        from game import create_bot
+
+        def make_bot(kind, level):
+            # The RL bot only knows the 3x3 board, ultimate has a bot of its own
+            if self.win_length == ULTIMATE:
+                kind = "ultimate"
+            elif kind == "rl" and self.size != 3:
+                kind = "minimax"
+            return create_bot(kind, level.lower(), self.win_length, self.size)
+
         self.mode = mode
+        self.size, self.win_length = board
+        self.move_delay = 0 if fast_playback else self.MOVE_DELAY_MS
+        self.poll_ms = 1 if fast_playback else self.POLL_MS
         self.reset_game()
         
         if mode == "Player vs Bot":
             self.bot1 = None
-            self.bot2 = MinimaxBot(difficulty.lower())
+            self.bot2 = make_bot(bot_type, difficulty)
+            self.start_pondering()
         elif mode == "Bot vs Bot":
-            self.bot1 = MinimaxBot(bot1_difficulty.lower())
-            self.bot2 = MinimaxBot(bot2_difficulty.lower())
-            self.after(1000, self.make_bot_move)
+            # One type for both bots, or a (bot1, bot2) pair
+            bot1_type, bot2_type = (bot_type, bot_type) if isinstance(bot_type, str) else bot_type
+            self.bot1 = make_bot(bot1_type, bot1_difficulty)
+            self.bot2 = make_bot(bot2_type, bot2_difficulty)
+            self.after(self.move_delay, self.make_bot_move)
         else:  # Player vs Player
             self.bot1 = None
             self.bot2 = None
@@ -296,13 +519,15 @@ class GamePage(tk.Frame):
 
     def set_value(self, row, col):
         """Handle moves for all game modes"""
-        if self.matrix[row][col] is not None or (self.mode == "Bot vs Bot"):
+        if (not self.mat.is_legal(row, col) or (self.mode == "Bot vs Bot") or
+                self.bot_future is not None or
+                (self.mode == "Player vs Bot" and self.turn == "O")):
             return
 
         # Make the move
         current_value = 1 if self.turn == "X" else 0
-        self.matrix[row][col] = current_value
-        self.buttons[row][col].config(text=self.turn)
+        self._place(row, col, current_value)
+        self._record_move(row, col, time.perf_counter() - self.move_started)
         
         # Check for game end
         winner = self.mat.check_win()
@@ -317,18 +542,21 @@ class GamePage(tk.Frame):
         if self.mode == "Player vs Bot" and self.turn == "X":
             self.turn = "O"
             self.update_turn_label()
-            self.after(500, self.make_bot_move)
+            self.stop_pondering()
+            # Reply at once when the bot already searched this position
+            self.after(0 if self.bot2.has_pondered(self.matrix) else 500, self.make_bot_move)
         else:
             # Player vs Player or after bot's move
             self.turn = "O" if self.turn == "X" else "X"
             self.update_turn_label()
 
     def make_bot_move(self):
-        """Execute bot moves only when in bot modes"""
+        """Start the bot's search on a worker thread for bot modes"""
         # Early return if game is over or not in a bot mode
         if (self.mat.check_win() is not None or 
             self.mat.check_draw() or 
-            self.mode not in ["Bot vs Bot", "Player vs Bot"]):
+            self.mode not in ["Bot vs Bot", "Player vs Bot"] or
+            self.bot_future is not None):
             return
             
         current_bot = None
@@ -340,12 +568,66 @@ class GamePage(tk.Frame):
         if not current_bot:
             return
             
-        # Execute bot's move
-        bot_row, bot_col = current_bot.get_move(self.matrix)
+        # The bot searches a copy, the live board is only touched on the Tk thread
+        snapshot = self.mat.bot_view()
+        self.bot_started = time.perf_counter()
+        self.bot_stop = threading.Event()
+        self.bot_future = self.executor.submit(self._timed_move, current_bot, snapshot, self.bot_stop)
+        self.status_label.config(text="Bot is thinking...")
+        self.after(self.poll_ms, self._poll_bot_move, self.bot_future)
+
+    def _poll_bot_move(self, future):
+        """Check the worker from the Tk event loop until the bot's move is ready"""
+        if future is not self.bot_future:
+            return  # the game was reset while the bot was thinking
+        elapsed = time.perf_counter() - self.bot_started
+        if not future.done():
+            self.status_label.config(text=f"Bot is thinking... {elapsed:.1f}s")
+            self.after(self.poll_ms, self._poll_bot_move, future)
+            return
+        self.bot_future = None
+        move, seconds = future.result()
+        self.status_label.config(text=f"Bot searched for {seconds:.2f}s")
+        self._apply_bot_move(move, seconds)
+
+    @staticmethod
+    def _timed_move(bot, board, stop_event):
+        """Runs on the worker thread: the bot's move and how long it took"""
+        start = time.perf_counter()
+        move = bot.get_move(board, stop_event)
+        return move, time.perf_counter() - start
+
+    def start_pondering(self):
+        """Let the bot search its replies on the worker while the player thinks"""
+        self.stop_pondering()
+        self.ponder_stop = threading.Event()
+        snapshot = self.mat.bot_view()
+        self.executor.submit(self.bot2.ponder, snapshot, self.ponder_stop)
+
+    def stop_pondering(self):
+        if self.ponder_stop is not None:
+            self.ponder_stop.set()
+            self.ponder_stop = None
+
+    def cancel_bot_move(self):
+        """Stop the pending bot search, so the worker is free for the next one; its result is ignored"""
+        self.stop_pondering()
+        if self.bot_future is not None:
+            self.bot_future.cancel()
+            self.bot_future = None
+        if self.bot_stop is not None:
+            self.bot_stop.set()
+            self.bot_stop = None
+        self.status_label.config(text="")
+
+    def _apply_bot_move(self, move, seconds=None):
+        if move is None:
+            return
+        bot_row, bot_col = move
         if bot_row is not None and bot_col is not None:
             current_value = 1 if self.turn == "X" else 0
-            self.matrix[bot_row][bot_col] = current_value
-            self.buttons[bot_row][bot_col].config(text=self.turn)
+            self._place(bot_row, bot_col, current_value)
+            self._record_move(bot_row, bot_col, seconds)
             
             # Check for game end
             winner = self.mat.check_win()
@@ -362,17 +644,50 @@ class GamePage(tk.Frame):
             
             # Schedule next bot move if in Bot vs Bot mode
             if self.mode == "Bot vs Bot":
-                self.after(1000, self.make_bot_move)
+                self.after(self.move_delay, self.make_bot_move)
+            elif self.mode == "Player vs Bot":
+                self.start_pondering()
 
     def reset_game(self):
-        self.mat = matrix()
+        self.cancel_bot_move()
+        self._end_record(None, finished=False)
+        self.mat = matrix(self.size, self.win_length)
         self.matrix = self.mat.matrix
         self.turn = "X"
-        for row in self.buttons:
-            for button in row:
-                button.config(text="", state="normal")
+        self.board_view.reset(self.size, 3 if self.win_length == ULTIMATE else None)
+        self._show_forced()
         self.update_turn_label()
 
+    def _place(self, row, col, value):
+        """Play a move on the matrix and the canvas"""
+        self.mat.place(row, col, value)
+        self.board_view.set_cell(row, col, value)
+        self._show_forced()
+
+    def _show_forced(self):
+        """In ultimate, outline the small board the next move has to be played in"""
+        state = self.mat.state
+        if not isinstance(state, UltimateBoard) or state.forced is None or state.is_over():
+            self.board_view.highlight(None)
+        else:
+            self.board_view.highlight((state.forced // 3 * 3, state.forced % 3 * 3, 3))
+
+    def _record_move(self, row, col, seconds):
+        """Stream a move to the app's game record, starting the record on the first move"""
+        self.move_started = time.perf_counter()
+        recorder = self.master.recorder
+        if recorder is None:
+            return
+        if recorder.current is None:
+            players = (describe_player(self.bot1), describe_player(self.bot2))
+            recorder.begin_game(self.size, self.win_length, players)
+        recorder.record_move(row * self.size + col, seconds)
+
+    def _end_record(self, winner, finished=True):
+        recorder = self.master.recorder
+        if recorder is not None and recorder.current is not None:
+            recorder.end_game(winner, finished)
+
     def update_turn_label(self):
         """Update the turn label based on game mode"""
         if self.mode == "Player vs Bot":
@@ -1,9 +1,29 @@
-from gui import TicTacToeApp
-from bots.minimax_bot import MinimaxBot
+import argparse
+
+from engine.records import GameWriter
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tic Tac Toe")
+    parser.add_argument('--record', metavar='PATH', help="append every game played to this record file")
+    parser.add_argument('--headless', action='store_true',
+                        help="play in the terminal, without loading tkinter or PIL")
+    args = parser.parse_args(argv)
+    recorder = GameWriter(args.record) if args.record else None
+
+    if args.headless:
+        import game
+        try:
+            game.main(recorder)
+        finally:
+            if recorder is not None:
+                recorder.close()
+        return
+
+    # tkinter is only imported for the windowed app
+    from gui import TicTacToeApp
 
-def main():
     # Create the application
-    app = TicTacToeApp()
+    app = TicTacToeApp(recorder)
     
     # Configure window properties
     app.title("Tic Tac Toe")
@@ -11,7 +31,11 @@ def main():
     app.resizable(False, False)
     
     # Start the application
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        if recorder is not None:
+            recorder.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,356 @@
+"""
+Asyncio game server speaking newline-delimited JSON over TCP.
+
+Each line a client sends is one request object and gets exactly one
+response line back. Requests:
+
+    {"type": "new", "size": 3, "win_length": 3, "bot": "minimax:hard"}
+    {"type": "move", "game_id": "...", "square": 4}       (or "row"/"col")
+    {"type": "bot_move", "game_id": "..."}
+    {"type": "state", "game_id": "..."}
+    {"type": "close", "game_id": "..."}
+
+Responses are {"ok": true, ...} with the game state, or {"ok": false,
+"error": "..."}. An "id" field on a request is echoed back. Bot searches
+run in a bounded thread pool so a slow search never blocks the event loop
+or the other sessions.
+
+Games with the same bot, difficulty and board share one MoveBatcher.
+bot_move requests that arrive while it is busy are queued and answered as
+the next batch: boards holding the same (or a symmetric) position are
+searched once, and the distinct positions are searched in parallel, each
+by a bot of its own.
+
+A session is its packed engine.state.GameState plus two bytes for the
+bot. The most recently used ones stay in memory and idle ones are spilled
+to a memory-mapped file (engine.sessions), so memory stays flat however
+many games are open.
+
+Run with:
+    python server.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from bots.bot_interface import BotInterface
+from engine.sessions import SessionStore
+from engine.state import NONE, O_WON, GameState
+from engine.transposition import board_symmetries
+from game import create_bot
+
+# Bot types and difficulties a session can name, stored as their index
+BOT_TYPES = ('minimax', 'mcts', 'rl')
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+class ProtocolError(Exception):
+    """A request the server cannot handle, reported back to the client"""
+
+
+def _field(request, name, kind, default=None):
+    """request[name], which must be a ``kind`` (bool is not an int), ``default`` when missing or null"""
+    value = request.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ProtocolError(f"{name!r} must be {'an integer' if kind is int else 'a string'}")
+    return value
+
+
+def _canonical(board):
+    """Smallest image of ``board`` over its 8 symmetries, equal for symmetric positions"""
+    size = len(board)
+    flat = [cell for row in board for cell in row]
+    best = None
+    for perm in board_symmetries(size):
+        image = [None] * (size * size)
+        for square, cell in enumerate(flat):
+            image[perm[square]] = cell
+        image = tuple(image)
+        if best is None or image < best:
+            best = image
+    return best
+
+
+class MoveBatcher:
+    """
+    Answers bot_move requests for one bot type, difficulty and board.
+    Requests made while a batch is being searched wait for the next one.
+    A batch is split by position, and each distinct position is one
+    get_moves job on the executor, run by a bot from ``make_bot`` that no
+    other job is using, at most ``workers`` at a time. Bots whose get_moves
+    maps one answer onto symmetric boards get those boards in one job.
+    """
+
+    def __init__(self, make_bot, executor, workers):
+        self.make_bot = make_bot
+        self.idle = [make_bot()]  # bots not searching, reused by later jobs
+        self.shares_work = type(self.idle[0]).get_moves is not BotInterface.get_moves
+        self.executor = executor
+        self.slots = asyncio.Semaphore(workers)
+        self.pending = []  # (board, future)
+        self.running = False
+        self.batches = 0
+
+    async def get_move(self, board):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((board, future))
+        if not self.running:
+            self.running = True
+            loop.create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.pending:
+                # Let requests read in the same pass of the event loop join this batch
+                await asyncio.sleep(0)
+                batch, self.pending = self.pending, []
+                self.batches += 1
+                groups = {}
+                for board, future in batch:
+                    key = _canonical(board) if self.shares_work else id(future)
+                    groups.setdefault(key, []).append((board, future))
+                await asyncio.gather(*(self._answer(loop, group) for group in groups.values()))
+        finally:
+            self.running = False
+
+    async def _answer(self, loop, group):
+        """Search one position on a free bot and answer every request in ``group``"""
+        async with self.slots:
+            bot = self.idle.pop() if self.idle else self.make_bot()
+            try:
+                moves = await loop.run_in_executor(
+                    self.executor, bot.get_moves, [board for board, _ in group])
+            except Exception as e:
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self.idle.append(bot)
+        for (_, future), move in zip(group, moves):
+            if not future.done():
+                future.set_result(move)
+
+
+class Session:
+    """One game hosted by the server"""
+    __slots__ = ('game', 'bot_type', 'difficulty', 'lock', 'users')
+
+    def __init__(self, size=3, win_length=None, bot_spec='minimax:hard', game=None):
+        if game is None:
+            if not 3 <= size <= 19:
+                raise ProtocolError("size must be between 3 and 19")
+            try:
+                game = GameState(size, win_length)
+            except ValueError as e:
+                raise ProtocolError(str(e))
+            bot_type, _, difficulty = bot_spec.partition(':')
+            bot_type, difficulty = bot_type.lower(), (difficulty or 'hard').lower()
+            if bot_type not in BOT_TYPES:
+                raise ProtocolError(f"unknown bot {bot_type!r}, use one of {', '.join(BOT_TYPES)}")
+            if difficulty not in DIFFICULTIES:
+                raise ProtocolError(f"unknown difficulty {difficulty!r}, use one of {', '.join(DIFFICULTIES)}")
+        else:
+            bot_type, difficulty = bot_spec
+        self.game = game
+        self.bot_type = bot_type
+        self.difficulty = difficulty
+        # Only exist while requests use the session, which keeps it from being spilled
+        self.lock = None
+        self.users = 0
+
+    @property
+    def bot_key(self):
+        """Sessions with the same key share a MoveBatcher and its bots"""
+        return (self.bot_type, self.difficulty, self.game.size, self.game.win_length)
+
+    @property
+    def busy(self):
+        return self.users > 0
+
+    @property
+    def over(self):
+        return self.game.is_over()
+
+    def play(self, square):
+        if self.over:
+            raise ProtocolError("game is over")
+        if not self.game.play(square):
+            raise ProtocolError("illegal move")
+
+    def state(self):
+        game = self.game
+        return {
+            'board': game.cells(),
+            'size': game.size,
+            'win_length': game.win_length,
+            'turn': None if self.over else game.turn,
+            'winner': None if game.winner == NONE else 'O' if game.winner == O_WON else 'X',
+            'draw': game.winner == NONE and self.over,
+            'moves': game.moves,
+        }
+
+    def pack(self):
+        return bytes((BOT_TYPES.index(self.bot_type), DIFFICULTIES.index(self.difficulty))) + self.game.pack()
+
+    @classmethod
+    def unpack(cls, data):
+        return cls(bot_spec=(BOT_TYPES[data[0]], DIFFICULTIES[data[1]]), game=GameState.unpack(data[2:]))
+
+
+class GameServer:
+    def __init__(self, workers=4, max_sessions=100000, hot_sessions=10000, spill_path=None):
+        self.sessions = SessionStore(Session.unpack, hot_sessions, spill_path)
+        self.max_sessions = max_sessions
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batchers = {}
+
+    def _batcher(self, key):
+        """The MoveBatcher shared by every session with this bot key"""
+        batcher = self.batchers.get(key)
+        if batcher is None:
+            bot_type, difficulty, size, win_length = key
+            try:
+                batcher = MoveBatcher(lambda: create_bot(bot_type, difficulty, win_length, size),
+                                      self.executor, self.workers)
+            except (ValueError, KeyError) as e:
+                raise ProtocolError(str(e))
+            self.batchers[key] = batcher
+        return batcher
+
+    async def handle_request(self, request):
+        """Dispatch one decoded request and return the response dict"""
+        kind = request.get('type')
+        if kind == 'new':
+            if len(self.sessions) >= self.max_sessions:
+                raise ProtocolError("server is full")
+            session = Session(_field(request, 'size', int, 3), _field(request, 'win_length', int),
+                              _field(request, 'bot', str, 'minimax:hard'))
+            self._batcher(session.bot_key)  # reject bots that cannot play this board
+            game_id = self.sessions.add(session)
+            return {'game_id': game_id, **session.state()}
+
+        game_id = _field(request, 'game_id', str)
+        if kind == 'state':
+            return {'game_id': game_id, **self._session(game_id).state()}
+        if kind == 'close':
+            if not self.sessions.remove(game_id):
+                raise ProtocolError("unknown game_id")
+            return {'game_id': game_id}
+        if kind == 'move':
+            async with self._using(game_id) as session:
+                session.play(self._square(session, request))
+                return {'game_id': game_id, **session.state()}
+        if kind == 'bot_move':
+            async with self._using(game_id) as session:
+                if session.over:
+                    raise ProtocolError("game is over")
+                board = session.game.to_matrix()
+                row, col = await self._batcher(session.bot_key).get_move(board)
+                square = row * session.game.size + col
+                session.play(square)
+                return {'game_id': game_id, 'square': square, **session.state()}
+        raise ProtocolError(f"unknown request type {kind!r}")
+
+    def _session(self, game_id):
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise ProtocolError("unknown game_id")
+        return session
+
+    @contextlib.asynccontextmanager
+    async def _using(self, game_id):
+        """Hold the session's lock; a session in use stays in memory until its last request ends"""
+        session = self._session(game_id)
+        if session.lock is None:
+            session.lock = asyncio.Lock()
+        session.users += 1
+        try:
+            async with session.lock:
+                yield session
+        finally:
+            session.users -= 1
+            if not session.users:
+                session.lock = None
+
+    def _square(self, session, request):
+        square = _field(request, 'square', int)
+        if square is not None:
+            return square
+        row, col = _field(request, 'row', int), _field(request, 'col', int)
+        if row is None or col is None:
+            raise ProtocolError("move needs 'square' or 'row' and 'col'")
+        size = session.game.size
+        if not (0 <= row < size and 0 <= col < size):
+            raise ProtocolError("illegal move")
+        return row * size + col
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self._respond(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("request must be a JSON object")
+        except ValueError:
+            return {'ok': False, 'error': "invalid JSON"}
+        except ProtocolError as e:
+            return {'ok': False, 'error': str(e)}
+        try:
+            response = {'ok': True, **await self.handle_request(request)}
+        except (ProtocolError, ValueError, TypeError) as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # A bug in a bot or the server must not drop the client's connection
+            response = {'ok': False, 'error': f"internal error: {type(e).__name__}"}
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tic Tac Toe JSON game server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4, help="threads for bot searches")
+    parser.add_argument('--max-sessions', type=int, default=100000)
+    parser.add_argument('--hot-sessions', type=int, default=10000,
+                        help="sessions kept in memory, idle ones beyond this are spilled to disk")
+    parser.add_argument('--spill-file', default=None,
+                        help="file idle sessions are spilled to (default: an anonymous temporary file)")
+    args = parser.parse_args(argv)
+    server = GameServer(args.workers, args.max_sessions, args.hot_sessions, args.spill_file)
+    print(f"Serving on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""
+Headless bot-vs-bot tournament runner.
+
+Plays every ordered pairing of the given bots (each bot gets both colors)
+across a process pool, without printing boards. Every game is seeded from
+the base seed and its index, so a run can be reproduced exactly whatever
+the number of workers. Bots that search against a wall-clock budget (the
+N x N boards) can still differ from run to run.
+
+Example:
+    python tournament.py minimax:easy minimax:medium minimax:hard --games 1000
+    python tournament.py --calibrate 0.5 1 2 4 --games 1000
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import permutations
+
+from bots.minimax_bot import MinimaxBot
+from engine.records import GameWriter
+from game import TicTacToe, create_bot
+
+
+def parse_bot(spec):
+    """'minimax:hard' -> ('minimax', 'hard')"""
+    bot_type, _, difficulty = spec.partition(':')
+    return bot_type, difficulty or 'hard'
+
+
+def game_seed(base_seed, index):
+    """Seed for one game, independent of how games are split across workers"""
+    return base_seed * 1000003 + index
+
+
+def play_headless(game, player1, player2, move_times=None, moves=None):
+    """
+    Play a bot-vs-bot game on ``game`` without printing.
+    Returns 'X', 'O' or None for a draw. When ``move_times`` is a pair of
+    lists, each bot's move latencies are appended to its list, and when
+    ``moves`` is a list the squares played are appended to it.
+    """
+    players = (player1, player2)
+    letters = ('X', 'O')
+    turn = 0
+    while game.empty_squares():
+        bot = players[turn]
+        start = time.perf_counter()
+        row, col = bot.get_move(game.get_board_2d())
+        if move_times is not None:
+            move_times[turn].append(time.perf_counter() - start)
+        game.make_move(row * game.size + col, letters[turn])
+        if moves is not None:
+            moves.append(row * game.size + col)
+        if game.current_winner:
+            return game.current_winner
+        turn = 1 - turn
+    return None
+
+
+def _play_chunk(task):
+    """Worker: play games [start, stop) of one pairing and return the tallies"""
+    x_spec, o_spec, start, stop, base_seed, size, win_length, record = task
+    x_bot = create_bot(*parse_bot(x_spec), win_length=win_length, size=size)
+    o_bot = create_bot(*parse_bot(o_spec), win_length=win_length, size=size)
+    result = {'x': x_spec, 'o': o_spec, 'x_wins': 0, 'o_wins': 0, 'draws': 0,
+              'x_times': [0.0, 0, 0.0], 'o_times': [0.0, 0, 0.0], 'games': []}
+    for index in range(start, stop):
+        random.seed(game_seed(base_seed, index))
+        move_times = ([], [])
+        moves = [] if record else None
+        started = time.time()
+        game = TicTacToe(size, win_length)
+        winner = play_headless(game, x_bot, o_bot, move_times, moves)
+        if record:
+            # X's and O's latencies interleaved back into move order
+            times = [move_times[i % 2][i // 2] for i in range(len(moves))]
+            result['games'].append((index, moves, winner, started, times, game.win_length))
+        if winner == 'X':
+            result['x_wins'] += 1
+        elif winner == 'O':
+            result['o_wins'] += 1
+        else:
+            result['draws'] += 1
+        # [total seconds, number of moves, slowest move]
+        for key, times in (('x_times', move_times[0]), ('o_times', move_times[1])):
+            if times:
+                result[key][0] += sum(times)
+                result[key][1] += len(times)
+                result[key][2] = max(result[key][2], max(times))
+    return result
+
+
+def _calibration_chunk(task):
+    """Worker: games [start, stop) of a sampled MinimaxBot against perfect play"""
+    temperature, as_x, start, stop, base_seed = task
+    sampled = MinimaxBot('medium', temperature=temperature)
+    perfect = MinimaxBot('hard')
+    players = (sampled, perfect) if as_x else (perfect, sampled)
+    letter = 'X' if as_x else 'O'
+    tally = [0, 0, 0]  # wins, draws, losses of the sampled bot
+    for index in range(start, stop):
+        random.seed(game_seed(base_seed, index))
+        winner = play_headless(TicTacToe(), *players)
+        tally[0 if winner == letter else 1 if winner is None else 2] += 1
+    return temperature, as_x, tally
+
+
+def calibrate(temperatures, games=1000, workers=None, seed=0, chunk_size=250):
+    """
+    Measure how often MinimaxBot loses to perfect play at each sampling
+    temperature, playing ``games`` games as X and as O. Returns
+    {temperature: {'X': [wins, draws, losses], 'O': [...]}}, the numbers the
+    difficulty temperatures in bots.minimax_bot are picked from.
+    """
+    tasks = []
+    for temperature in temperatures:
+        for as_x in (True, False):
+            offset = len(tasks) * games
+            for start in range(0, games, chunk_size):
+                tasks.append((temperature, as_x, offset + start, offset + min(start + chunk_size, games), seed))
+    results = {temperature: {'X': [0, 0, 0], 'O': [0, 0, 0]} for temperature in temperatures}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for temperature, as_x, tally in pool.map(_calibration_chunk, tasks):
+            totals = results[temperature]['X' if as_x else 'O']
+            for i, count in enumerate(tally):
+                totals[i] += count
+    return results
+
+
+def estimate_elo(scores, iterations=200, anchor=1500.0):
+    """
+    Fit Elo ratings to pairwise results.
+    ``scores[(a, b)]`` is (points scored by a, games) over all games a vs b.
+    One virtual draw per pairing keeps ratings finite when a bot never loses.
+    """
+    bots = sorted({bot for pair in scores for bot in pair})
+    ratings = {bot: anchor for bot in bots}
+    for _ in range(iterations):
+        for bot in bots:
+            actual = expected = games = 0.0
+            for (a, b), (points, count) in scores.items():
+                if a != bot or b == bot:
+                    continue
+                actual += points + 0.5
+                expected += (count + 1) / (1 + 10 ** ((ratings[b] - ratings[bot]) / 400))
+                games += count + 1
+            if games:
+                # Step scaled by the number of games played
+                ratings[bot] += 400 * (actual - expected) / games
+        shift = anchor - sum(ratings.values()) / len(ratings)
+        for bot in bots:
+            ratings[bot] += shift
+    return ratings
+
+
+class Tournament:
+    def __init__(self, bots, games=100, workers=None, seed=0, size=3, win_length=None, chunk_size=250,
+                 recorder=None):
+        self.bots = list(bots)
+        self.games = games
+        self.workers = workers
+        self.seed = seed
+        self.size = size
+        self.win_length = win_length
+        self.chunk_size = chunk_size
+        # Optional engine.records.GameWriter receiving every game as its chunk finishes
+        self.recorder = recorder
+
+        self.results = {}  # (x_spec, o_spec) -> [x wins, o wins, draws]
+        self.latency = {bot: [0.0, 0, 0.0] for bot in self.bots}
+
+    def _tasks(self):
+        pairings = list(permutations(self.bots, 2)) or [(self.bots[0], self.bots[0])]
+        offset = 0
+        for x_spec, o_spec in pairings:
+            for start in range(0, self.games, self.chunk_size):
+                stop = min(start + self.chunk_size, self.games)
+                yield (x_spec, o_spec, offset + start, offset + stop, self.seed, self.size, self.win_length,
+                       self.recorder is not None)
+            offset += self.games
+
+    def _record(self, result):
+        if self.recorder is not None:
+            players = (parse_bot(result['x']), parse_bot(result['o']))
+            for index, moves, winner, started, times, win_length in result['games']:
+                self.recorder.write_game(moves, winner, self.size, win_length, players,
+                                         game_seed(self.seed, index), started, sum(times), times)
+        tally = self.results.setdefault((result['x'], result['o']), [0, 0, 0])
+        tally[0] += result['x_wins']
+        tally[1] += result['o_wins']
+        tally[2] += result['draws']
+        for spec, times in ((result['x'], result['x_times']), (result['o'], result['o_times'])):
+            latency = self.latency[spec]
+            latency[0] += times[0]
+            latency[1] += times[1]
+            latency[2] = max(latency[2], times[2])
+
+    def run(self, on_progress=None):
+        """Play every chunk, calling ``on_progress(result, done, total)`` as chunks finish"""
+        tasks = list(self._tasks())
+        total = sum(task[3] - task[2] for task in tasks)
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(_play_chunk, task) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                self._record(result)
+                done += result['x_wins'] + result['o_wins'] + result['draws']
+                if on_progress:
+                    on_progress(result, done, total)
+        return self.summary()
+
+    def summary(self):
+        scores = {}
+        standings = {bot: {'wins': 0, 'draws': 0, 'losses': 0} for bot in self.bots}
+        for (x_spec, o_spec), (x_wins, o_wins, draws) in self.results.items():
+            if x_spec != o_spec:
+                for a, b, points in ((x_spec, o_spec, x_wins + draws / 2), (o_spec, x_spec, o_wins + draws / 2)):
+                    prev_points, prev_games = scores.get((a, b), (0.0, 0))
+                    scores[(a, b)] = (prev_points + points, prev_games + x_wins + o_wins + draws)
+            standings[x_spec]['wins'] += x_wins
+            standings[x_spec]['losses'] += o_wins
+            standings[x_spec]['draws'] += draws
+            standings[o_spec]['wins'] += o_wins
+            standings[o_spec]['losses'] += x_wins
+            standings[o_spec]['draws'] += draws
+        elo = estimate_elo(scores) if scores else {bot: 1500.0 for bot in self.bots}
+        for bot in self.bots:
+            total, moves, slowest = self.latency[bot]
+            standings[bot]['elo'] = round(elo[bot], 1)
+            standings[bot]['mean_move_ms'] = 1000 * total / moves if moves else 0.0
+            standings[bot]['max_move_ms'] = 1000 * slowest
+        return {
+            'seed': self.seed,
+            'size': self.size,
+            'win_length': self.win_length,
+            'games_per_pairing': self.games,
+            'pairings': [{'x': x, 'o': o, 'x_wins': t[0], 'o_wins': t[1], 'draws': t[2]}
+                         for (x, o), t in sorted(self.results.items())],
+            'standings': standings,
+        }
+
+
+def _print_progress(result, done, total):
+    print(f"[{done:>9}/{total}] {result['x']} (X) vs {result['o']} (O): "
+          f"X {result['x_wins']}  O {result['o_wins']}  draw {result['draws']}", flush=True)
+
+
+def _print_summary(summary):
+    print("\nbot                     W        D        L      Elo   mean ms    max ms")
+    for bot, s in sorted(summary['standings'].items(), key=lambda item: -item[1]['elo']):
+        print(f"{bot:<20}{s['wins']:>5}{s['draws']:>9}{s['losses']:>9}{s['elo']:>9.1f}"
+              f"{s['mean_move_ms']:>10.3f}{s['max_move_ms']:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless bot-vs-bot tournament")
+    parser.add_argument('bots', nargs='*', help="bot specs such as minimax:easy")
+    parser.add_argument('--games', type=int, default=100, help="games per ordered pairing")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--win-length', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=250, help="games per worker task")
+    parser.add_argument('--json', help="write the final results to this file")
+    parser.add_argument('--quiet', action='store_true', help="do not stream per-chunk results")
+    parser.add_argument('--record', metavar='PATH', help="append every game to this record file")
+    parser.add_argument('--calibrate', nargs='*', type=float, metavar='TEMPERATURE',
+                        help="measure MinimaxBot's loss rate against perfect play at these "
+                             "sampling temperatures instead of running a tournament")
+    args = parser.parse_args(argv)
+
+    if args.calibrate is not None:
+        temperatures = args.calibrate or [0.25, 0.5, 1.0, 2.0, 4.0, 8.0]
+        results = calibrate(temperatures, args.games, args.workers, args.seed, args.chunk_size)
+        print("temperature    as X: W/D/L        as O: W/D/L")
+        for temperature, result in results.items():
+            x, o = result['X'], result['O']
+            print(f"{temperature:>11.2f}{x[0]:>8}/{x[1]}/{x[2]:<8}{o[0]:>8}/{o[1]}/{o[2]}")
+        return results
+    if not args.bots:
+        parser.error("give at least one bot spec, or --calibrate")
+
+    recorder = GameWriter(args.record) if args.record else None
+    tournament = Tournament(args.bots, args.games, args.workers, args.seed,
+                            args.size, args.win_length, args.chunk_size, recorder)
+    try:
+        summary = tournament.run(None if args.quiet else _print_progress)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    _print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == '__main__':
+    main()